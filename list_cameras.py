@@ -1,34 +1,53 @@
-import pyrealsense2 as rs
 import logging
 
-logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
 
 def list_cameras():
+    # Imported here rather than at module top: the realsense DSO takes
+    # hundreds of ms to load, which importers of this module shouldn't
+    # pay unless they actually enumerate cameras.
+    import pyrealsense2 as rs
+
     ctx = rs.context()
     devices = ctx.query_devices()
-    
-    if len(devices) == 0:
-        logging.warning("No RealSense devices found!")
+
+    # len() on the device-list proxy may re-query; take it once
+    n = len(devices)
+    if n == 0:
+        log.warning("No RealSense devices found!")
         return
-        
-    logging.info(f"Found {len(devices)} RealSense device(s):")
-    
+
+    # When INFO is off (library use at WARNING), skip the per-device
+    # get_info round-trips and formatting entirely
+    if not log.isEnabledFor(logging.INFO):
+        return
+
+    log.info("Found %d RealSense device(s):", n)
+
+    # Resolve the enum members once instead of per device
+    _ci = rs.camera_info
+    _name, _serial, _pid, _fw = (
+        _ci.name, _ci.serial_number, _ci.product_id, _ci.firmware_version
+    )
+
     for i, dev in enumerate(devices):
         try:
-            name = dev.get_info(rs.camera_info.name)
-            serial = dev.get_info(rs.camera_info.serial_number)
-            product_id = dev.get_info(rs.camera_info.product_id)
-            firmware = dev.get_info(rs.camera_info.firmware_version)
-            
-            logging.info(f"Device {i}:")
-            logging.info(f"  Name: {name}")
-            logging.info(f"  Serial Number: {serial}")
-            logging.info(f"  Product ID: {product_id}")
-            logging.info(f"  Firmware Version: {firmware}")
-            logging.info("")
-            
+            name = dev.get_info(_name)
+            serial = dev.get_info(_serial)
+            product_id = dev.get_info(_pid)
+            firmware = dev.get_info(_fw)
+
+            # One log record per device instead of six, with lazy
+            # %-formatting so disabled loggers skip the string build
+            log.info(
+                "Device %d:\n  Name: %s\n  Serial Number: %s\n"
+                "  Product ID: %s\n  Firmware Version: %s\n",
+                i, name, serial, product_id, firmware
+            )
+
         except Exception as e:
-            logging.error(f"Error getting info for device {i}: {e}")
+            log.error("Error getting info for device %d: %s", i, e)
 
 if __name__ == "__main__":
-    list_cameras() 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    list_cameras()
@@ -5,6 +5,7 @@ import pyrealsense2 as rs
 import numpy as np
 import math as m
 import signal
+import select
 import sys
 import time
 import threading
@@ -19,20 +20,64 @@ from pymavlink import mavutil
 import cv2
 
 import logging
-from collections import deque
+import queue
 import gi
 gi.require_version('Gst', '1.0')
 gi.require_version('GstRtspServer', '1.0')
 from gi.repository import Gst, GstRtspServer, GLib
 import argparse
+import functools
 
 logging.basicConfig(level=logging.INFO)
 
+# Optional numba acceleration for the obstacle band reduction. The JIT
+# kernel skips both the interpreter and NumPy dispatch; when numba is not
+# installed the vectorized OpenCV/NumPy path below is used instead.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _reduce_band(band, step, n_cols, min_depth_m, max_depth_m, depth_scale, out):
+        for i in prange(n_cols):
+            lowest = 65535
+            for r in range(band.shape[0]):
+                for c in range(i * step, (i + 1) * step):
+                    v = band[r, c]
+                    if v and v < lowest:
+                        lowest = v
+            dist_m = lowest * depth_scale
+            if dist_m > min_depth_m and dist_m < max_depth_m:
+                out[i] = int(dist_m * 100)
+            else:
+                out[i] = 65535
+
+
+# Parsed once per process, however many times Settings is instantiated;
+# library users and tests skip the argparse tree rebuild entirely.
+# lru_cache rather than functools.cache: the JetPack 4.6 image runs
+# Python 3.6, which predates the cache alias.
+@functools.lru_cache(maxsize=None)
+def _get_args():
+    parser = argparse.ArgumentParser(description="Realsense Service")
+    parser.add_argument('--connect', type=str, default="/dev/ttyTHS1", help="Mavlink device connection string")
+    parser.add_argument('--baudrate', type=int, default=230400, help="Baudrate for mavlink device")
+    parser.add_argument('--rtsp_enable', type=bool, default=True, help="Enable RTSP streaming")
+    parser.add_argument('--video_enable', type=bool, default=False, help="Enable video streaming")
+    parser.add_argument('--colorization_enable', type=bool, default=True, help="Enable colorization streaming")
+    parser.add_argument('--use_preset', type=bool, default=True, help="Use preset configuration file")
+    parser.add_argument('--front-serial', type=str, default=None, help="Serial number of the front-facing RealSense camera")
+    parser.add_argument('--back-serial', type=str, default=None, help="Serial number of the back-facing RealSense camera")
+    return parser.parse_args()
+
 
 class Settings:
     
     def __init__(self):
-        args = self.parse_args()
+        args = _get_args()
         self.mavlink_device = args.connect
         self.baudrate = args.baudrate
         self.rtsp_enable = args.rtsp_enable
@@ -52,29 +97,60 @@ class Settings:
         if self.num_cameras == 0:
             logging.warning("No camera serial numbers provided. Attempting to find any compatible device.")
     
-    def parse_args(self):
-        parser = argparse.ArgumentParser(description="Realsense Service")
-        parser.add_argument('--connect', type=str, default="/dev/ttyTHS1", help="Mavlink device connection string")
-        parser.add_argument('--baudrate', type=int, default=230400, help="Baudrate for mavlink device")
-        parser.add_argument('--rtsp_enable', type=bool, default=True, help="Enable RTSP streaming")
-        parser.add_argument('--video_enable', type=bool, default=False, help="Enable video streaming")
-        parser.add_argument('--colorization_enable', type=bool, default=True, help="Enable colorization streaming")
-        parser.add_argument('--use_preset', type=bool, default=True, help="Use preset configuration file")
-        parser.add_argument('--front-serial', type=str, default=None, help="Serial number of the front-facing RealSense camera")
-        parser.add_argument('--back-serial', type=str, default=None, help="Serial number of the back-facing RealSense camera")
-        return parser.parse_args()
-
             
 
+# Pipeline description shared by every stream, composed once at import
+# and formatted per factory in configure(). The leaky single-buffer
+# queue after the appsrc drops the stale frame under backpressure, so a
+# slow encoder can never serve frames from several ticks back. (appsrc's
+# own max-buffers/leaky-type properties would do the same but need
+# GStreamer 1.20; the legacy Jetson Nano image ships 1.14.)
+_LAUNCH_TEMPLATE = (
+    'appsrc name={name} is-live=true do-timestamp=true block=false format=GST_FORMAT_TIME '
+    'max-bytes=0 '
+    'caps=video/x-raw,format=RGBA,width={width},height={height},framerate={fps}/1 '
+    "! queue max-size-buffers=1 leaky=downstream "
+    "! identity sync=true "
+    # Explicit NVMM caps: the RGBA->NV12 conversion runs once on the VIC
+    # and the encoder reads device memory directly, instead of nvvidconv
+    # staging frames back through system memory
+    "! nvvidconv ! video/x-raw(memory:NVMM),format=NV12 "
+    "! nvv4l2h264enc "
+        "profile=0 "
+        "control-rate=1 "  # CBR, no quality-driven rate swings
+        "bitrate=1000000 "
+        "preset-level=1 "  # UltraFast: lowest encoder-side delay
+        "vbv-size=1 "      # minimal rate-control buffering
+        "EnableTwopassCBR=false "
+        "num-B-Frames=0 "
+        "maxperf-enable=true "
+        "iframeinterval=15 "
+        "idrinterval=15 "
+    # The parser re-injects SPS/PPS on every IDR (config-interval=-1),
+    # which is what actually lets late joiners pick the stream up; the
+    # per-frame AUD/VUI NALUs the encoder used to insert only added
+    # packet overhead
+    "! h264parse config-interval=-1 "
+    '! rtph264pay name=pay0 pt=96 mtu=1400'
+)
+
+
 class StreamFactory(GstRtspServer.RTSPMediaFactory):
+
+    # Number of preallocated frame slots; must be a power of two
+    RING_SIZE = 8
+
     def __init__(self, appsink_src='source', **properties):
         super(StreamFactory, self).__init__(**properties)
-        self.frame_lock = threading.Lock()
         self.last_frame = None
         self.appsink_src = appsink_src
-        self.color_buffer = deque(maxlen=5)
+        # Single-producer/single-consumer ring: the camera thread copies
+        # into the next slot and bumps the head; the streaming thread only
+        # reads the newest complete slot. Plain int increments are atomic
+        # under the GIL, so no lock is needed.
+        self._ring = None
+        self._head = 0
     
-    # TODO:FIXME: sometimes old buffers are shown from a a couple of frames back
     def configure(self, fps, color_width, color_height):
         self.number_frames = 0
         self.fps = fps
@@ -82,56 +158,43 @@ class StreamFactory(GstRtspServer.RTSPMediaFactory):
         self.duration = 1 / self.fps * Gst.SECOND
         self.width = color_width
         self.height = color_height
-        self.launch_string = (
-            f'appsrc name={self.appsink_src} is-live=true do_timestamp=true block=false format=GST_FORMAT_TIME ' 
-            f'caps=video/x-raw,format=RGBA,width={color_width},height={color_height},framerate={fps}/1 ' 
-            "! identity sync=true "
-            "! nvvidconv ! nvv4l2h264enc " 
-                "profile=0 " 
-                "bitrate=1000000 " 
-                # "EnableTwopassCBR=true "\
-                # "num-Ref-Frames=2 "\
-                "insert-sps-pps=true "\
-                "maxperf-enable=true "\
-                "poc-type=2 "\
-                "insert-aud=true "\
-                "insert-vui=true "\
-                "iframeinterval=3 "\
-                "idrinterval=1 "\
-            '! rtph264pay config-interval=-1 name=pay0 pt=96'
-            
+        self.launch_string = _LAUNCH_TEMPLATE.format(
+            name=self.appsink_src, width=color_width, height=color_height, fps=fps
         )
         
-        self.last_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8).tobytes()
+        self._ring = np.zeros(
+            (self.RING_SIZE, color_height, color_width, 4), dtype=np.uint8
+        )
+        self._head = 0
+        # Black fallback frame, served while no real frame has arrived yet
+        self.last_frame = bytes(self.height * self.width * 4)
         
         
     def add_to_buffer(self, frame):
-        with self.frame_lock:
-            self.color_buffer.append(frame)
-            
-    def get_from_buffer(self):
-        with self.frame_lock:
-            return self.color_buffer.pop()
+        # One memcpy into stable, preallocated memory; also detaches the
+        # stream from the producer's (possibly realsense-owned) buffer
+        np.copyto(self._ring[self._head & (self.RING_SIZE - 1)], frame)
+        self._head += 1
 
     def on_need_data(self, src, length):
         
-        frame = None
-        
-        try:
-            frame = self.get_from_buffer()
-        except IndexError as e:
-            logging.error(f"{self.appsink_src} frame not ready!") 
-            frame = None
-        
-        if frame is None:
-            data = self.last_frame
-        if frame is not None:
-            data = frame.tobytes()
+        head = self._head
+        if head:
+            # One memcpy out of the newest ring slot into an owned bytes
+            # object. PyGI cannot wrap foreign memory zero-copy (its array
+            # marshaller copies the data regardless and only has a fast
+            # path for bytes), so an explicit copy of stable ring memory
+            # is the cheapest safe hand-off.
+            data = bytes(
+                memoryview(self._ring[(head - 1) & (self.RING_SIZE - 1)]).cast('B')
+            )
             self.last_frame = data
-            
-        buf = Gst.Buffer.new_allocate(None, len(data), None)
-        buf.fill(0, data)
-        
+        else:
+            logging.error(f"{self.appsink_src} frame not ready!")
+            data = self.last_frame
+
+        buf = Gst.Buffer.new_wrapped(data)
+
         buf.duration = self.duration
         timestamp = self.number_frames * self.duration
         buf.pts = buf.dts = int(timestamp)
@@ -210,7 +273,8 @@ class MavlinkIntegration:
         self.heartbeat_thread = threading.Thread(target=self.send_heartbeat)
         self.receive_thread = threading.Thread(target=self.receive_data)
         self.obstacle_thread = threading.Thread(target=self.send_obstacles)
-        self.obstacle_queue = deque(maxlen=5)
+        # Bounded queue so the sender wakes on push instead of polling
+        self.obstacle_queue = queue.Queue(maxsize=5)
         
         self.min_depth_cm = 0
         self.max_depth_cm = 0
@@ -218,6 +282,11 @@ class MavlinkIntegration:
         self.angle_offset = 0
         self.increment_f = 0
         self.last_obstacle_distance_sent_ms = 0
+        # Message-type dispatch for the receive pump
+        self._handlers = {'ATTITUDE': self._on_attitude}
+        # Bound send method, cached in configure() so the 15 Hz send path
+        # skips the conn.mav attribute chain per call
+        self._od_send = None
         
     def wait_for_heartbeat(self, timeout=10):
         """
@@ -284,17 +353,37 @@ class MavlinkIntegration:
         self.obstacle_thread.join()
         self.conn.close()
         
+    def _on_attitude(self, message):
+        self.vehicle_pitch_rad = message.pitch
+        if self.debug_enable == 1:
+            logging.info("INFO: Received ATTITUDE msg, current pitch is %.2f degrees" % (m.degrees(self.vehicle_pitch_rad),))
+        if not self.connected:
+            logging.info("Connection to ArduPilot confirmed (received ATTITUDE message)")
+            self.connected = True
+
     def receive_data(self):
+        # Drain every message already buffered per wake (one parser call
+        # plus a dict dispatch each), then block in select() on the
+        # connection descriptor until more bytes arrive. This keeps
+        # ATTITUDE latency bounded however many other message types the
+        # autopilot emits, with no polling sleep.
         while not self.time_to_exit:
             try:
-                message = self.conn.recv_match(type='ATTITUDE', timeout=0.5, blocking=True)
-                if message:
-                    self.vehicle_pitch_rad = message.pitch
-                    if self.debug_enable == 1:
-                        logging.info("INFO: Received ATTITUDE msg, current pitch is %.2f degrees" % (m.degrees(self.vehicle_pitch_rad),))
-                    if not self.connected:
-                        logging.info("Connection to ArduPilot confirmed (received ATTITUDE message)")
-                        self.connected = True
+                drained = False
+                while True:
+                    message = self.conn.recv_msg()
+                    if message is None:
+                        break
+                    drained = True
+                    handler = self._handlers.get(message.get_type())
+                    if handler is not None:
+                        handler(message)
+
+                fd = getattr(self.conn, 'fd', None)
+                if fd is not None:
+                    select.select([fd], [], [], 0.5)
+                elif not drained:
+                    time.sleep(0.01)
             except Exception as e:
                 logging.error("Error while receiving data: %s" % e)
                 time.sleep(0.01)
@@ -314,14 +403,28 @@ class MavlinkIntegration:
             
             time.sleep(1)
             
+    def push_obstacle(self, distances, sensing_time):
+        # Latest wins: on overrun drop the oldest entry rather than block
+        # the filter thread, preserving the old deque(maxlen=5) semantics
+        try:
+            self.obstacle_queue.put_nowait((distances, sensing_time))
+        except queue.Full:
+            try:
+                self.obstacle_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.obstacle_queue.put_nowait((distances, sensing_time))
+            except queue.Full:
+                pass
+
     def send_obstacles(self):
         while not self.time_to_exit:
             try:
-                distances, current_time_us = self.obstacle_queue.pop()
-                self.send_obstacle_distance_message(current_time_us, distances)
-            except IndexError as e:
-                # logging.warning("Could not pop obstacle from obstacle_queue")
-                time.sleep(0.01)
+                distances, current_time_us = self.obstacle_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.send_obstacle_distance_message(current_time_us, distances)
             
     def send_obstacle_distance_message(self, sensing_time, distances):
         if sensing_time == self.last_obstacle_distance_sent_ms:
@@ -334,10 +437,13 @@ class MavlinkIntegration:
         else:
             #TODO:FIXME: configure these
             try:
-                self.conn.mav.obstacle_distance_send(
+                self._od_send(
                     sensing_time,    # us Timestamp (UNIX time or time since system boot)
                     0,                  # sensor_type, defined here: https://mavlink.io/en/messages/common.html#MAV_DISTANCE_SENSOR
-                    distances,          # distances,    uint16_t[72],   cm
+                    # tolist() converts all 72 elements in one C call;
+                    # passing the numpy array would make the codegen's
+                    # pack loop cast each scalar individually
+                    distances.tolist(), # distances,    uint16_t[72],   cm
                     0,                  # increment,    uint8_t,        deg
                     self.min_depth_cm,	    # min_distance, uint16_t,       cm
                     self.max_depth_cm,       # max_distance, uint16_t,       cm
@@ -355,6 +461,7 @@ class MavlinkIntegration:
         self.distances_array_length = distances_array_length
         self.angle_offset = angle_offset
         self.increment_f = increment_f
+        self._od_send = self.conn.mav.obstacle_distance_send
         
 class RealsenseService:
     
@@ -418,22 +525,35 @@ class RealsenseService:
             self.device_id = None
             self.camera_name = None
             self.pipe = None
+            # Constructed once for the service lifetime: the SDK-side
+            # sink queue survives reconnects and is never rebuilt per
+            # frame, like the filter objects below
+            self._frame_queue = rs.frame_queue(2, keep_frames=False)
             self.depth_scale = 0
             self.depth_hfov_deg = None
             self.depth_vfov_deg = None
-            self.colorizer = rs.colorizer()
-            
-            # 7 is white close black far
-            self.colorizer.set_option(rs.option.color_scheme, 7)
-            self.colorizer.set_option(rs.option.min_distance, 1.0)
-            self.colorizer.set_option(rs.option.max_distance, 2.5)
+            self._vfov_half_sin_inv = None
+            self._base_line_height = None
+            # Colorization range (white close, black far), matching the
+            # old rs.colorizer color_scheme=7 setup. The LUT itself is
+            # built once the depth scale is known.
+            self._colorize_min_m = 1.0
+            self._colorize_max_m = 2.5
+            self._colorize_lut = None
             
             self.min_depth_cm = int(self.DEPTH_RANGE_M[0] * 100)  # In cm
             self.max_depth_cm = int(self.DEPTH_RANGE_M[1] * 100)  # In cm, should be a little conservative
             self.distances_array_length = 72
             self.angle_offset = None
             self.increment_f  = None
-            self.distances = np.ones((self.distances_array_length,), dtype=np.uint16) * (self.max_depth_cm + 1)
+            # Ring of preallocated result buffers: each frame writes into
+            # the next slot in-place, so no per-frame allocation and the
+            # mavlink thread can still read the previous slot. Eight slots
+            # comfortably cover the 5-deep obstacle queue.
+            self._dist_ring = np.full(
+                (8, self.distances_array_length), self.max_depth_cm + 1, dtype=np.uint16
+            )
+            self._dist_ring_idx = 0
             
             self.debug_enable = False
             self.display_name  = 'Input/output depth'
@@ -458,6 +578,12 @@ class RealsenseService:
             )
             
             self.camera_thread = threading.Thread(target=self.camer_reader)
+
+            # Depth post-processing runs on its own thread behind a 1-deep
+            # leaky queue, so a slow filter step never stalls frame polling;
+            # the librealsense filters release the GIL while they run
+            self._filter_q = queue.Queue(maxsize=1)
+            self.filter_thread = threading.Thread(target=self._filter_worker)
         except Exception as e:
             logging.error(f"Error during initialization: {e}")
             logging.error(traceback.format_exc())
@@ -472,9 +598,11 @@ class RealsenseService:
                     logging.warning(f"Failed to configure advanced settings: {e}")
                     logging.warning("Continuing without preset configuration")
             self.realsense_connect()
+            self._build_colorizer_lut()
             self.set_obstacle_distance_params()
             self.find_obstacle_line_height()
             self.configure_depth_shape()
+            self.filter_thread.start()
             self.camera_thread.start()
             
             self.mavlink.configure(
@@ -511,6 +639,7 @@ class RealsenseService:
         self.time_to_exit = True
         self.pipe.stop()
         self.camera_thread.join()
+        self.filter_thread.join()
         self.mavlink.stop()
         if self.glib_loop:
             self.glib_loop.quit()
@@ -593,8 +722,10 @@ class RealsenseService:
                 self.STREAM_TYPE[1], self.COLOR_WIDTH, self.COLOR_HEIGHT, self.FORMAT[1], self.COLOR_FPS
             )
 
-        # Start streaming with requested config
-        profile = self.pipe.start(config)
+        # Start streaming into the long-lived queue sink: the SDK
+        # delivers framesets on its own thread and the reader just
+        # dequeues, skipping the pipeline's per-call frameset composition
+        profile = self.pipe.start(config, self._frame_queue)
 
         # Getting the depth sensor's depth scale (see rs-align example for explanation)
         depth_sensor = profile.get_device().first_depth_sensor()
@@ -610,6 +741,23 @@ class RealsenseService:
         self.realsense_load_settings_file(advnc_mode, setting_file) # Pass advnc_mode
 
     # Setting parameters for the OBSTACLE_DISTANCE message based on actual camera's intrinsics and user-defined params
+    def _build_colorizer_lut(self):
+        # Map every possible raw z16 value to an RGBA pixel once, so
+        # colorizing a frame collapses to a single fancy-index gather
+        # instead of librealsense's per-pixel CPU colorizer plus a
+        # cv2.cvtColor pass.
+        depth_m = np.arange(65536, dtype=np.float32) * self.depth_scale
+        span = self._colorize_max_m - self._colorize_min_m
+        intensity = np.clip((self._colorize_max_m - depth_m) / span, 0.0, 1.0)
+        lut = np.empty((65536, 4), dtype=np.uint8)
+        gray = (intensity * 255).astype(np.uint8)
+        lut[:, 0] = gray
+        lut[:, 1] = gray
+        lut[:, 2] = gray
+        lut[:, 3] = 255
+        lut[0] = (0, 0, 0, 255)  # no depth data renders black
+        self._colorize_lut = lut
+
     def set_obstacle_distance_params(self):
         # !! This needs to be done per camera, using its specific intrinsics and orientation !!
         
@@ -643,15 +791,21 @@ class RealsenseService:
         if self.obstacle_line_thickness_pixel < 1 or self.obstacle_line_thickness_pixel > self.DEPTH_HEIGHT:
             logging.error("Please make sure the thickness is within [0-DEPTH_HEIGHT]: %s" % self.obstacle_line_thickness_pixel)
             sys.exit()
+
+        # Constants reused by find_obstacle_line_height on every frame:
+        # the VFOV half-sine denominator and the uncompensated line height
+        self._vfov_half_sin_inv = 1.0 / m.sin(m.radians(self.depth_vfov_deg) / 2)
+        self._base_line_height = self.DEPTH_HEIGHT * self.obstacle_line_height_ratio
             
     def find_obstacle_line_height(self):
 
         # Basic position
-        obstacle_line_height = self.DEPTH_HEIGHT * self.obstacle_line_height_ratio
+        obstacle_line_height = self._base_line_height
 
-        # Compensate for the vehicle's pitch angle if data is available
-        if self.mavlink.vehicle_pitch_rad is not None and self.depth_vfov_deg is not None:
-            delta_height = m.sin(self.mavlink.vehicle_pitch_rad / 2) / m.sin(m.radians(self.depth_vfov_deg) / 2) * self.DEPTH_HEIGHT
+        # Compensate for the vehicle's pitch angle if data is available,
+        # using the constants cached in set_obstacle_distance_params
+        if self.mavlink.vehicle_pitch_rad is not None and self._vfov_half_sin_inv is not None:
+            delta_height = m.sin(self.mavlink.vehicle_pitch_rad / 2) * self._vfov_half_sin_inv * self.DEPTH_HEIGHT
             obstacle_line_height += delta_height
 
         # Sanity check
@@ -693,46 +847,41 @@ class RealsenseService:
         self.upper_pixel = int(self.upper_pixel)
         self.lower_pixel = int(self.lower_pixel)
 
+        # Width of the image actually covered by the distance columns;
+        # computed here once so the per-frame scan just slices
+        self.band_width = self.step * self.distances_array_length
+
     
     def distances_from_depth_image(self, depth_mat, distances, min_depth_m, max_depth_m):
-        # TODO: make fast via numpy
-
-        for i in range(self.distances_array_length):
-            
-
-            min_point_in_scan = np.min(depth_mat[int(self.lower_pixel):int(self.upper_pixel), int(i * self.step)])
-            dist_m = min_point_in_scan * self.depth_scale
-
-            distances[i] = 65535
+        # One vectorized pass over the obstacle band instead of a Python
+        # loop per column. The band is reshaped (rows, columns, step) so a
+        # single min-reduction yields every column's closest pixel; zeros
+        # (no depth data) are masked to 65535 so they never win the min.
+        band = depth_mat[self.lower_pixel:self.upper_pixel, :self.band_width]
+
+        if njit is not None:
+            _reduce_band(
+                band, self.step, self.distances_array_length,
+                min_depth_m, max_depth_m, self.depth_scale, distances
+            )
+            return distances
+
+        band = np.where(band == 0, np.uint16(65535), band)
+        # cv2.reduce runs the row reduction in one NEON/SSE pass, leaving
+        # only the short per-column min to NumPy
+        row_min = cv2.reduce(band, 0, cv2.REDUCE_MIN)
+        min_points_in_scan = row_min.reshape(
+            self.distances_array_length, self.step
+        ).min(axis=1)
+
+        # Note that dist_m is in meter, while distances[] is in cm.
+        dist_m = min_points_in_scan * self.depth_scale
+        distances.fill(65535)
+        valid_mask = (dist_m > min_depth_m) & (dist_m < max_depth_m)
+        distances[valid_mask] = (dist_m[valid_mask] * 100).astype(np.uint16)
 
-            # Note that dist_m is in meter, while distances[] is in cm.
-            if dist_m > min_depth_m and dist_m < max_depth_m:
-                distances[i] = dist_m * 100
-        
         return distances
     
-    # TODO:FIXME: make it work fast via numpy
-    # def distances_from_depth_image_fast(self, depth_mat, distances, min_depth_m, max_depth_m):
-    #     # Parameters for depth image
-        
-    #     # Extract the relevant part of the depth matrix
-    #     depth_slice = depth_mat[self.lower_pixel:self.upper_pixel, ::self.step]
-        
-    #     # Find the minimum depth value in each column
-    #     min_points_in_scan = np.min(depth_slice, axis=0)
-        
-    #     # Convert depth values to meters
-    #     dist_m = min_points_in_scan * self.depth_scale
-        
-    #     # Initialize distances array to 65535
-    #     distances.fill(65535)
-        
-    #     # Apply the depth range filter and convert to centimeters
-    #     valid_mask = (dist_m > min_depth_m) & (dist_m < max_depth_m)
-    #     distances[valid_mask] = dist_m[valid_mask] * 100
-        
-    #     return distances
-    
     def _filter_dept_frame(self, depth_frame):
         filtered_frame = depth_frame
         for f in self.filter_to_apply:
@@ -741,6 +890,14 @@ class RealsenseService:
         return filtered_frame
         
     
+    def _filter_worker(self):
+        while not self.time_to_exit:
+            try:
+                depth_frame, sensing_time = self._filter_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._process_depth_frame(depth_frame, sensing_time)
+
     def _process_depth_frame(self, depth_frame, sensing_time):
         try:
             # Apply the filters
@@ -750,23 +907,22 @@ class RealsenseService:
             depth_data = filtered_frame.as_frame().get_data()
             depth_mat = np.asanyarray(depth_data)
             
-            # Create obstacle distance data from depth image
+            # Create obstacle distance data from depth image, written
+            # in-place into the next ring slot
+            slot = self._dist_ring[self._dist_ring_idx]
+            self._dist_ring_idx = (self._dist_ring_idx + 1) & 7
             distances = self.distances_from_depth_image(
                 depth_mat, 
-                self.distances, self.DEPTH_RANGE_M[0], 
+                slot, self.DEPTH_RANGE_M[0], 
                 self.DEPTH_RANGE_M[1]
             )
             
-            self.mavlink.obstacle_queue.append((distances, sensing_time,))
+            self.mavlink.push_obstacle(distances, sensing_time)
 
             if self.RTSP_STREAMING_ENABLE and self.COLORIZATION_ENABLE and self.gst_server is not None and self.gst_server.colorized_video is not None:
-                # Use CPU-based processing instead of CUDA
-                depth_colormap = np.asanyarray(self.colorizer.colorize(filtered_frame).get_data())
-                
-                # Convert to RGBA without using CUDA
-                colorized_frame = cv2.cvtColor(depth_colormap, cv2.COLOR_BGR2RGBA)
-                
-                self.gst_server.colorized_video.add_to_buffer(colorized_frame)
+                # One gathered load straight to RGBA; reuses the depth
+                # matrix already extracted for the distance scan
+                self.gst_server.colorized_video.add_to_buffer(self._colorize_lut[depth_mat])
         except Exception as e:
             logging.error(f"Error processing depth frame: {e}")
 
@@ -781,16 +937,26 @@ class RealsenseService:
     def camer_reader(self):
         while not self.time_to_exit:
             try:
-                # This call waits until a new coherent set of frames is available on a device
-                # Calls to get_frame_data(...) and get_frame_timestamp(...) on a device will return stable values until wait_for_frames(...) is called
-                frames = self.pipe.wait_for_frames()
+                # Dequeue the next coherent frameset; the bounded timeout
+                # keeps shutdown responsive
+                ok, frame = self._frame_queue.try_wait_for_frame(500)
+                if not ok:
+                    continue
+                frames = frame.as_frameset()
                 
                 depth_frame = frames.get_depth_frame()
                 # sensing_time = int(round(time.time() * 1000000))
                 sensing_time = int(round(depth_frame.timestamp * 1000))
                 
                 if depth_frame:
-                    self._process_depth_frame(depth_frame, sensing_time)
+                    # keep() detaches the frame from the SDK's internal
+                    # pool so the filter thread can hold it past the next
+                    # wait_for_frames call
+                    depth_frame.keep()
+                    try:
+                        self._filter_q.put_nowait((depth_frame, sensing_time))
+                    except queue.Full:
+                        pass  # drop in favour of the fresher frame coming
                 
                 if self.RTSP_STREAMING_ENABLE and self.VIDEO_ENABLE and self.gst_server is not None:
                     color_frame = frames.get_color_frame()
@@ -27,7 +27,7 @@ BACK_CAM_FRAME = mavutil.mavlink.MAV_FRAME_BODY_FRD
 import cv2
 
 import logging
-from collections import deque
+import queue
 import gi
 gi.require_version('Gst', '1.0')
 gi.require_version('GstRtspServer', '1.0')
@@ -36,11 +36,64 @@ import argparse
 
 logging.basicConfig(level=logging.INFO)
 
+# Optional: numba compiles the scan kernel below to machine code with a
+# parallel loop over the bins. The service runs fine without it, falling
+# back to the NumPy path in distances_from_depth_image.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _min_scan(roi, lo_raw, hi_raw, cm_scale, out):
+        # Fused min + range filter + cm conversion: one pass over the scan
+        # region instead of separate reduction, scale, compare and store
+        # passes with float intermediates. nogil lets the Mavlink and
+        # acquisition threads run while the scan executes.
+        for i in prange(roi.shape[0]):
+            m = np.uint16(65535)
+            row = roi[i]
+            for j in range(row.shape[0]):
+                v = row[j]
+                if v < m:
+                    m = v
+            if lo_raw < m < hi_raw:
+                out[i] = np.uint16(m * cm_scale)
+            else:
+                out[i] = np.uint16(65535)
+
+    def _make_min_scan(n_bins, n_rows, lo_raw, hi_raw, cm_scale):
+        # Specialize the scan kernel for one camera's fixed configuration:
+        # closure values become compile-time constants, so LLVM sees
+        # literal trip counts and thresholds and can unroll and vectorize
+        # the inner loop. Built once per camera at connect.
+        @njit(parallel=True, fastmath=True, nogil=True)
+        def kernel(roi, out):
+            for i in prange(n_bins):
+                m = np.uint16(65535)
+                row = roi[i]
+                for j in range(n_rows):
+                    v = row[j]
+                    if v < m:
+                        m = v
+                if lo_raw < m < hi_raw:
+                    out[i] = np.uint16(m * cm_scale)
+                else:
+                    out[i] = np.uint16(65535)
+        return kernel
+
 class ManagedCamera:
     """
     Encapsulates a single RealSense camera with all its configuration and processing
     """
-    def __init__(self, 
+
+    # The obstacle path consumes every depth frame (safety-critical); the
+    # RTSP previews only need a monitoring rate. Streams are decimated to
+    # roughly this frame rate.
+    RTSP_TARGET_FPS = 5
+
+    def __init__(self,
                  camera_name,
                  serial_number=None, 
                  depth_width=640, 
@@ -117,7 +170,6 @@ class ManagedCamera:
         self.depth_scale = 0
         self.depth_hfov_deg = None
         self.depth_vfov_deg = None
-        self.colorizer = rs.colorizer()
         self.filters = [
             [False, "Decimation Filter",    rs.decimation_filter()],
             [True,  "Threshold Filter",    rs.threshold_filter()],
@@ -128,10 +180,19 @@ class ManagedCamera:
             [True,  "Disparity to Depth",  rs.disparity_transform(False)]
         ]
         
-        # Colorizer configuration
-        self.colorizer.set_option(rs.option.color_scheme, 7)  # 7 is white close black far
-        self.colorizer.set_option(rs.option.min_distance, 1.0)
-        self.colorizer.set_option(rs.option.max_distance, 2.5)
+        # Colorization window (white close, black far, like the old
+        # rs.colorizer settings). The LUT itself is built once the depth
+        # scale is known in connect().
+        self._colorize_min_m = 1.0
+        self._colorize_max_m = 2.5
+        self._colorize_lut = None
+
+        # Preallocated RGBA output slots for the colorized stream, filled
+        # in place so the hot path stops allocating a full frame per push.
+        # A small ring (power of two) keeps frames already queued for the
+        # encoder intact while the next one is written.
+        self._rgba_ring = None
+        self._rgba_idx = 0
         
         # Configure threshold filter if enabled
         if self.filters[1][0] is True:
@@ -144,6 +205,20 @@ class ManagedCamera:
         # Camera thread
         self.camera_thread = None
         self.time_to_exit = False
+
+        # Acquisition hands frames to a processing worker over a small
+        # bounded queue, so filtering, the obstacle scan and colorization
+        # never block the next wait_for_frames. maxsize keeps latency
+        # bounded: when the worker falls behind, new frames are dropped
+        # instead of queueing up.
+        self.process_queue = queue.Queue(maxsize=2)
+        self.process_thread = None
+
+        # Decimation factors for the RTSP previews
+        self._rtsp_decim = max(1, self.DEPTH_FPS // self.RTSP_TARGET_FPS)
+        self._rtsp_counter = 0
+        self._video_decim = max(1, self.COLOR_FPS // self.RTSP_TARGET_FPS)
+        self._video_counter = 0
         
         # Mavlink integration references (set from outside)
         self.mavlink_integration = None
@@ -160,6 +235,20 @@ class ManagedCamera:
         self.max_depth_cm = int(self.DEPTH_RANGE_M[1] * 100)
         self.angle_offset = None  # Set after camera intrinsics are obtained
         self.increment_f = None   # Set after camera intrinsics are obtained
+
+        # Raw-unit scan thresholds and cm conversion factor; set once the
+        # depth scale is known in connect()
+        self._lo_raw = None
+        self._hi_raw = None
+        self._cm_scale = None
+
+        # Reduction output scratch for the NumPy scan path, reused across
+        # frames (cv2.reduce wants it as a column vector)
+        self._min_scratch = np.empty((self.distances_array_length, 1), dtype=np.uint16)
+
+        # Scan kernel specialized to this camera's configuration; built at
+        # connect once the scan geometry and depth scale are known
+        self._scan_kernel = None
         
         # Will be set during configuration
         self.obstacle_line_height = None
@@ -167,6 +256,8 @@ class ManagedCamera:
         self.upper_pixel = None
         self.lower_pixel = None
         self.step = None
+        self._row_slice = None
+        self._col_slice = None
 
     def find_device(self):
         """
@@ -182,7 +273,7 @@ class ManagedCamera:
         
         while retry_count < max_retries:
             try:
-                self.ctx = rs.context()
+                self.ctx = RealsenseService.get_context()
                 devices = self.ctx.query_devices()
                 logging.info(f"[{self.camera_name}] Searching for device among {len(devices)} found...")
                 
@@ -287,6 +378,9 @@ class ManagedCamera:
                 # At this point the device will disconnect and re-connect
                 logging.info(f"[{self.camera_name}] Sleeping for 5 seconds...")
                 time.sleep(5)
+                # The reboot re-enumerated the bus; drop the shared context
+                # so the fresh device list is visible
+                RealsenseService.invalidate_context()
                 # Need to find the device again
                 if not self.find_device():
                     logging.error(f"[{self.camera_name}] Failed to reconnect to device after enabling advanced mode")
@@ -352,10 +446,40 @@ class ManagedCamera:
             depth_sensor = profile.get_device().first_depth_sensor()
             self.depth_scale = depth_sensor.get_depth_scale()
             logging.info(f"[{self.camera_name}] Depth scale is: {self.depth_scale}")
+
+            # Convert the configured depth range to raw sensor units once, so
+            # the per-frame scan compares uint16 values directly instead of
+            # scaling every bin to meters first.
+            self._lo_raw = self.threshold_min_m / self.depth_scale
+            self._hi_raw = self.threshold_max_m / self.depth_scale
+            self._cm_scale = self.depth_scale * 100.0
+
+            self._build_colorizer_lut()
+            self._rgba_ring = np.empty(
+                (8, self.DEPTH_HEIGHT, self.DEPTH_WIDTH, 4), dtype=np.uint8
+            )
             
             # Calculate obstacle detection parameters
             self.calculate_obstacle_params(profile)
-            
+
+            if njit is not None:
+                self._scan_kernel = _make_min_scan(
+                    self.distances_array_length,
+                    self.upper_pixel - self.lower_pixel,
+                    self._lo_raw,
+                    self._hi_raw,
+                    self._cm_scale
+                )
+                # Warm-compile here so the first real frame doesn't pay the
+                # JIT latency
+                self._scan_kernel(
+                    np.zeros(
+                        (self.distances_array_length, self.upper_pixel - self.lower_pixel),
+                        dtype=np.uint16
+                    ),
+                    np.empty(self.distances_array_length, dtype=np.uint16)
+                )
+
             return True
             
         except Exception as e:
@@ -452,7 +576,32 @@ class ManagedCamera:
         self.center_pixel = int(self.center_pixel)
         self.upper_pixel = int(self.upper_pixel)
         self.lower_pixel = int(self.lower_pixel)
+
+        # Frame-invariant slice objects for the scan extraction; rebuilt
+        # here whenever the scan line is reconfigured
+        self._row_slice = slice(self.lower_pixel, self.upper_pixel)
+        self._col_slice = slice(None, self.step * self.distances_array_length, self.step)
         
+    def _build_colorizer_lut(self):
+        """
+        Build a 65536-entry raw-depth to RGBA lookup table replacing the
+        rs.colorizer + cvtColor pair: colorizing a frame becomes a single
+        gather that yields RGBA directly, with no per-pixel math and no
+        separate BGR to RGBA conversion pass
+        """
+        depth_m = np.arange(65536, dtype=np.float32) * self.depth_scale
+        span = self._colorize_max_m - self._colorize_min_m
+        gray = np.clip((self._colorize_max_m - depth_m) / span, 0.0, 1.0)
+        gray = (gray * 255.0).astype(np.uint8)
+
+        lut = np.empty((65536, 4), dtype=np.uint8)
+        lut[:, 0] = gray
+        lut[:, 1] = gray
+        lut[:, 2] = gray
+        lut[:, 3] = 255
+        lut[0] = (0, 0, 0, 255)  # No-data pixels stay black
+        self._colorize_lut = lut
+
     def _filter_depth_frame(self, depth_frame):
         """
         Apply filters to depth frame
@@ -469,39 +618,83 @@ class ManagedCamera:
             
         return filtered_frame
 
-    def distances_from_depth_image(self, depth_mat, distances=None, min_depth_m=None, max_depth_m=None):
+    def scan_roi(self, depth_mat):
         """
-        Calculate obstacle distances from depth image
-        
+        Extract the obstacle scan region from a depth frame as a C-contiguous
+        (bins, rows) array.
+
+        The depth frame is row-major but the reduction runs down each scan
+        column, so reducing in place would walk memory with a stride of a
+        full image row per element. One transposed copy here makes every
+        per-bin reduction a contiguous scan, and its cost amortizes over all
+        bins.
+
+        Args:
+            depth_mat: Depth image matrix, shape (height, width)
+
+        Returns:
+            Contiguous array of shape (distances_array_length, scan rows)
+        """
+        roi = np.ascontiguousarray(
+            depth_mat[self._row_slice, self._col_slice].T
+        )
+        # Zero means "no depth data", not "touching the lens", but it wins
+        # every min and masks real returns in the same bin. Replace it with
+        # the no-obstacle sentinel in the private copy so all scan paths
+        # reduce over valid pixels only.
+        roi[roi == 0] = 65535
+        return roi
+
+    def distances_from_depth_image(self, roi, distances=None, min_depth_m=None, max_depth_m=None):
+        """
+        Calculate obstacle distances from the scan region of a depth image
+
         Args:
-            depth_mat: Depth image matrix
+            roi: Scan region from scan_roi(), shape (bins, rows)
             distances: Array to store distances (will create if None)
             min_depth_m: Minimum depth in meters (uses instance default if None)
             max_depth_m: Maximum depth in meters (uses instance default if None)
-            
+
         Returns:
             Array of distances in centimeters
         """
         if distances is None:
             distances = np.ones((self.distances_array_length,), dtype=np.uint16) * 65535
-            
-        if min_depth_m is None:
-            min_depth_m = self.DEPTH_RANGE_M[0]
-            
-        if max_depth_m is None:
-            max_depth_m = self.DEPTH_RANGE_M[1]
 
-        # Calculate distances for each column
-        for i in range(self.distances_array_length):
-            min_point_in_scan = np.min(depth_mat[int(self.lower_pixel):int(self.upper_pixel), int(i * self.step)])
-            dist_m = min_point_in_scan * self.depth_scale
+        # Thresholds are compared in raw sensor units so the scan never
+        # converts every bin to meters; the precomputed bounds cover the
+        # common case of the configured depth range.
+        lo_raw = self._lo_raw if min_depth_m is None else min_depth_m / self.depth_scale
+        hi_raw = self._hi_raw if max_depth_m is None else max_depth_m / self.depth_scale
 
-            distances[i] = 65535  # Default: no obstacle
+        if njit is not None:
+            # Single fused pass, parallel over the bins, entirely in
+            # compiled code. The specialized kernel has the configured
+            # bounds baked in as constants; the generic one covers explicit
+            # range overrides.
+            if (self._scan_kernel is not None
+                    and min_depth_m is None and max_depth_m is None):
+                self._scan_kernel(roi, distances)
+            else:
+                _min_scan(roi, lo_raw, hi_raw, self._cm_scale, distances)
+            return distances
+
+        # One reduction along the contiguous axis instead of a Python loop
+        # over the scan columns: the old per-column np.min paid interpreter
+        # and dispatch overhead N times per frame for a memory-bound kernel.
+        # cv2.reduce runs the uint16 min through OpenCV's SIMD dispatch
+        # (NEON on the Jetson targets), which NumPy's min does not.
+        min_points_in_scan = cv2.reduce(
+            roi, 1, cv2.REDUCE_MIN, dst=self._min_scratch
+        ).ravel()
+
+        distances.fill(65535)  # Default: no obstacle
+
+        # min_points_in_scan is in raw units, distances[] is in cm
+        valid = (min_points_in_scan > lo_raw) & (min_points_in_scan < hi_raw)
+        np.multiply(min_points_in_scan, self._cm_scale, out=distances,
+                    where=valid, casting='unsafe')
 
-            # Note that dist_m is in meter, while distances[] is in cm.
-            if dist_m > min_depth_m and dist_m < max_depth_m:
-                distances[i] = dist_m * 100
-        
         return distances
 
     def start_processing(self, mavlink_integration, rtsp_enabled=False, video_enabled=False, colorization_enabled=False):
@@ -533,8 +726,10 @@ class ManagedCamera:
             self.frame_type
         )
         
-        # Start camera thread
+        # Start processing worker and camera thread
         self.time_to_exit = False
+        self.process_thread = threading.Thread(target=self._process_worker)
+        self.process_thread.start()
         self.camera_thread = threading.Thread(
             target=self.camera_reader,
             args=(rtsp_enabled, video_enabled, colorization_enabled)
@@ -550,7 +745,10 @@ class ManagedCamera:
         self.time_to_exit = True
         if self.camera_thread:
             self.camera_thread.join()
-            
+
+        if self.process_thread:
+            self.process_thread.join()
+
         if self.pipe:
             self.pipe.stop()
 
@@ -565,24 +763,55 @@ class ManagedCamera:
         """
         while not self.time_to_exit:
             try:
-                # This call waits until a new coherent set of frames is available on a device
-                frames = self.pipe.wait_for_frames()
-                
-                depth_frame = frames.get_depth_frame()
-                sensing_time = int(round(depth_frame.timestamp * 1000))
-                
-                if depth_frame:
-                    self._process_depth_frame(depth_frame, sensing_time)
-                
-                if rtsp_enabled and video_enabled and self.gst_server is not None and self.video_stream is not None:
-                    color_frame = frames.get_color_frame()
-                    if color_frame:               
-                        self._process_color_frame(color_frame)
-                
+                # try_wait_for_frames returns a bool instead of raising on
+                # timeout, so routine camera hiccups don't bounce through
+                # exception handling and the 100 ms penalty sleep below
+                # (3-6 lost frames at stream rate). The try block covers
+                # only this I/O boundary.
+                ok, frames = self.pipe.try_wait_for_frames(500)
             except Exception as e:
                 logging.error(f"[{self.camera_name}] Error while reading camera: {e}")
                 time.sleep(0.1)
+                continue
+
+            if not ok:
+                continue
+
+            depth_frame = frames.get_depth_frame()
+
+            if depth_frame:
+                sensing_time = int(round(depth_frame.timestamp * 1000))
+                # keep() extends the frame's lifetime beyond this
+                # frameset so the worker can process it after the next
+                # wait. If the worker is behind, drop the frame rather
+                # than stall acquisition.
+                depth_frame.keep()
+                try:
+                    self.process_queue.put_nowait((depth_frame, sensing_time))
+                except queue.Full:
+                    pass
+
+            if (rtsp_enabled and video_enabled and self.gst_server is not None
+                    and self.video_stream is not None and self.video_stream.has_clients()):
+                self._video_counter += 1
+                if self._video_counter % self._video_decim == 0:
+                    color_frame = frames.get_color_frame()
+                    if color_frame:
+                        self._process_color_frame(color_frame)
                 
+    def _process_worker(self):
+        """
+        Drain the processing queue: filter each depth frame, compute obstacle
+        distances and feed the colorized RTSP stream, decoupled from frame
+        acquisition
+        """
+        while not self.time_to_exit:
+            try:
+                depth_frame, sensing_time = self.process_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._process_depth_frame(depth_frame, sensing_time)
+
     def _process_depth_frame(self, depth_frame, sensing_time):
         """
         Process a depth frame: filter, calculate distances, send to MAVLink, handle RTSP
@@ -595,33 +824,50 @@ class ManagedCamera:
             # Apply the filters
             filtered_frame = self._filter_depth_frame(depth_frame)
 
-            # Extract depth in matrix form
+            # Extract depth in matrix form. frombuffer aliases the frame's
+            # own memory (valid while filtered_frame is alive, i.e. for the
+            # rest of this method) where asanyarray could copy the frame.
             depth_data = filtered_frame.as_frame().get_data()
-            depth_mat = np.asanyarray(depth_data)
+            depth_mat = np.frombuffer(depth_data, dtype=np.uint16).reshape(
+                self.DEPTH_HEIGHT, self.DEPTH_WIDTH
+            )
             
             # Create obstacle distance data from depth image
             distances = self.distances_from_depth_image(
-                depth_mat, 
-                self.distances, 
-                self.DEPTH_RANGE_M[0], 
-                self.DEPTH_RANGE_M[1]
+                self.scan_roi(depth_mat), self.distances
             )
             
-            # Send to MAVLink
+            # Send to MAVLink; if the sender is behind, drop the oldest
+            # entry so fresh data still gets through
             if self.mavlink_integration:
-                self.mavlink_integration.obstacle_queue.append(
-                    (distances.copy(), sensing_time, self.sensor_type)
-                )
+                item = (distances.copy(), sensing_time, self.sensor_type)
+                obstacle_queue = self.mavlink_integration.obstacle_queue
+                try:
+                    obstacle_queue.put_nowait(item)
+                except queue.Full:
+                    try:
+                        obstacle_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    try:
+                        obstacle_queue.put_nowait(item)
+                    except queue.Full:
+                        pass
 
-            # Handle RTSP streaming of colorized depth
-            if self.gst_server is not None and self.colorized_stream is not None:
-                # Use CPU-based processing
-                depth_colormap = np.asanyarray(self.colorizer.colorize(filtered_frame).get_data())
-                
-                # Convert to RGBA
-                colorized_frame = cv2.cvtColor(depth_colormap, cv2.COLOR_BGR2RGBA)
-                
-                self.colorized_stream.add_to_buffer(colorized_frame)
+            # Handle RTSP streaming of colorized depth; skip the gather and
+            # buffer copy entirely while nobody is watching the stream
+            if (self.gst_server is not None and self.colorized_stream is not None
+                    and self.colorized_stream.has_clients()):
+                self._rtsp_counter += 1
+                if self._rtsp_counter % self._rtsp_decim == 0:
+                    # One LUT gather on the depth values already in hand
+                    # yields the RGBA frame directly, into the next
+                    # preallocated ring slot
+                    slot = self._rgba_ring[self._rgba_idx]
+                    self._rgba_idx = (self._rgba_idx + 1) & 7
+                    np.take(self._colorize_lut, depth_mat, axis=0, out=slot)
+
+                    self.colorized_stream.add_to_buffer(slot)
                 
         except Exception as e:
             logging.error(f"[{self.camera_name}] Error processing depth frame: {e}")
@@ -636,7 +882,12 @@ class ManagedCamera:
         """
         try:
             if self.gst_server is not None and self.video_stream is not None:
-                color_image = np.asanyarray(color_frame.get_data())
+                # Zero-copy view of the RGBA frame, same aliasing semantics
+                # as the asanyarray call it replaces but with the dtype and
+                # shape fixed up front instead of re-derived per frame
+                color_image = np.frombuffer(
+                    color_frame.get_data(), dtype=np.uint8
+                ).reshape(self.COLOR_HEIGHT, self.COLOR_WIDTH, 4)
                 self.video_stream.add_to_buffer(color_image)
         except Exception as e:
             logging.error(f"[{self.camera_name}] Error processing color frame: {e}")
@@ -696,14 +947,68 @@ class Settings:
 
             
 
+# The leaky single-buffer queue after the appsrc drops the stale frame
+# under backpressure, so a stalled consumer never backs latency up into
+# the producer. (appsrc's own max-buffers/leaky-type properties would do
+# the same but need GStreamer 1.20; the legacy Jetson Nano image ships
+# 1.14.) No identity sync element: with an is-live source it only added
+# render-clock waiting (about three frames of delay) for streams that
+# are already paced by the camera.
+_LAUNCH_TEMPLATE = (
+    'appsrc name={name} is-live=true do-timestamp=true block=false format=GST_FORMAT_TIME '
+    'max-bytes=0 '
+    'caps=video/x-raw,format=RGBA,width={width},height={height},framerate={fps}/1 '
+    "! queue max-size-buffers=1 leaky=downstream "
+    # Explicit NVMM caps: the RGBA->NV12 conversion runs once on the VIC
+    # and the encoder reads device memory directly, instead of nvvidconv
+    # staging frames back through system memory
+    "! nvvidconv ! video/x-raw(memory:NVMM),format=NV12 "
+    "! nvv4l2h264enc "
+        "profile=0 "
+        "control-rate=1 "  # CBR, no quality-driven rate swings
+        "bitrate=1000000 "
+        "preset-level=1 "  # UltraFast: lowest encoder-side delay
+        "vbv-size=1 "      # minimal rate-control buffering
+        "EnableTwopassCBR=false "
+        "num-B-Frames=0 "
+        "maxperf-enable=true "
+        "iframeinterval=15 "
+        "idrinterval=15 "
+    # The parser re-injects SPS/PPS on every IDR (config-interval=-1) so
+    # late joiners can pick the stream up
+    "! h264parse config-interval=-1 "
+    '! rtph264pay name=pay0 pt=96 mtu=1400'
+)
+
+
 class StreamFactory(GstRtspServer.RTSPMediaFactory):
+
+    # Slots in the frame ring shared with the appsrc; power of two so the
+    # slot index is a mask away from the running head counter
+    RING_SIZE = 8
+
     def __init__(self, appsink_src='source', **properties):
         super(StreamFactory, self).__init__(**properties)
-        self.frame_lock = threading.Lock()
         self.last_frame = None
         self.appsink_src = appsink_src
-        self.color_buffer = deque(maxlen=5)
-    
+        # Single-producer/single-consumer frame ring: the producer copies
+        # into the next slot, then publishes it by bumping _head (an int,
+        # atomic under the GIL), so neither side takes a lock and the
+        # consumer always sees the newest complete frame.
+        self._ring = None
+        self._head = 0
+        # Number of live (prepared) medias for this factory. The media is
+        # shared, so this is effectively "does anyone watch this stream".
+        self._live_media = 0
+
+    def has_clients(self):
+        """True while at least one client keeps this stream's media alive."""
+        return self._live_media > 0
+
+    def _on_media_unprepared(self, rtsp_media):
+        if self._live_media > 0:
+            self._live_media -= 1
+
     # TODO:FIXME: sometimes old buffers are shown from a a couple of frames back
     def configure(self, fps, color_width, color_height):
         self.number_frames = 0
@@ -712,47 +1017,40 @@ class StreamFactory(GstRtspServer.RTSPMediaFactory):
         self.duration = 1 / self.fps * Gst.SECOND
         self.width = color_width
         self.height = color_height
-        self.launch_string = (
-            f'appsrc name={self.appsink_src} is-live=true do_timestamp=true block=false format=GST_FORMAT_TIME ' 
-            f'caps=video/x-raw,format=RGBA,width={color_width},height={color_height},framerate={fps}/1 ' 
-            "! identity sync=true "
-            "! videoconvert ! video/x-raw,format=I420 "  # x264enc typically expects I420
-            "! x264enc " # Removed speed-preset and tune options, using defaults
-            "bitrate=1000 " # Adjust bitrate as needed (in kbps)
-            "key-int-max=30 " # Set keyframe interval
-            '! rtph264pay config-interval=-1 name=pay0 pt=96'
+        self.launch_string = _LAUNCH_TEMPLATE.format(
+            name=self.appsink_src, width=color_width, height=color_height, fps=fps
         )
-        
-        self.last_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8).tobytes()
-        
-        
+
+
+        self._ring = np.zeros(
+            (self.RING_SIZE, self.height, self.width, 4), dtype=np.uint8
+        )
+        # Black fallback frame, served while no real frame has arrived yet
+        self.last_frame = bytes(self.height * self.width * 4)
+
     def add_to_buffer(self, frame):
-        with self.frame_lock:
-            self.color_buffer.append(frame)
-            
-    def get_from_buffer(self):
-        with self.frame_lock:
-            return self.color_buffer.pop()
+        np.copyto(self._ring[self._head & (self.RING_SIZE - 1)], frame)
+        self._head += 1
 
     def on_need_data(self, src, length):
-        
-        frame = None
-        
-        try:
-            frame = self.get_from_buffer()
-        except IndexError as e:
-            logging.error(f"{self.appsink_src} frame not ready!") 
-            frame = None
-        
-        if frame is None:
+
+        head = self._head
+        if head == 0:
+            # Nothing produced yet; repeat the black frame
             data = self.last_frame
-        if frame is not None:
-            data = frame.tobytes()
+        else:
+            # One memcpy out of the newest ring slot into an owned bytes
+            # object. PyGI cannot wrap foreign memory zero-copy (its array
+            # marshaller copies the data regardless and only has a fast
+            # path for bytes), so an explicit copy of stable ring memory
+            # is the cheapest safe hand-off.
+            data = bytes(
+                memoryview(self._ring[(head - 1) & (self.RING_SIZE - 1)]).cast('B')
+            )
             self.last_frame = data
-            
-        buf = Gst.Buffer.new_allocate(None, len(data), None)
-        buf.fill(0, data)
-        
+
+        buf = Gst.Buffer.new_wrapped(data)
+
         buf.duration = self.duration
         timestamp = self.number_frames * self.duration
         buf.pts = buf.dts = int(timestamp)
@@ -770,6 +1068,8 @@ class StreamFactory(GstRtspServer.RTSPMediaFactory):
 
     def do_configure(self, rtsp_media):
         self.number_frames = 0
+        self._live_media += 1
+        rtsp_media.connect('unprepared', self._on_media_unprepared)
         consuming_appsrc = rtsp_media.get_element().get_child_by_name(self.appsink_src)
         consuming_appsrc.connect('need-data', self.on_need_data)
 
@@ -831,7 +1131,10 @@ class MavlinkIntegration:
         self.heartbeat_thread = threading.Thread(target=self.send_heartbeat)
         self.receive_thread = threading.Thread(target=self.receive_data)
         self.obstacle_thread = threading.Thread(target=self.send_obstacles)
-        self.obstacle_queue = deque(maxlen=10) # Increased size slightly for two cameras
+        # Bounded hand-off from the camera workers; the sender blocks on
+        # the queue's condition instead of polling, and producers drop the
+        # oldest entry on overflow
+        self.obstacle_queue = queue.Queue(maxsize=8)
         
         # Store parameters per sensor_type
         self.camera_params = {} # {sensor_type: {'min_depth_cm': ..., 'max_depth_cm': ..., 'angle_offset': ..., 'increment_f': ..., 'frame': ...}}
@@ -935,17 +1238,20 @@ class MavlinkIntegration:
     def send_obstacles(self):
         while not self.time_to_exit:
             try:
-                # Expecting (distances, sensing_time, sensor_type)
-                distances, sensing_time, sensor_type = self.obstacle_queue.popleft() # Use popleft for FIFO
+                # Blocking get instead of a polling sleep loop: the thread
+                # parks on the queue's condition until a camera worker
+                # hands over a frame. Expecting (distances, sensing_time,
+                # sensor_type).
+                distances, sensing_time, sensor_type = self.obstacle_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
                 self.send_obstacle_distance_message(sensing_time, distances, sensor_type)
-            except IndexError as e:
-                # Queue is empty, wait a bit
-                time.sleep(0.005) # Shorter sleep as queue might fill faster
             except Exception as e:
                 logging.error(f"Error in send_obstacles loop: {e}")
                 logging.error(f"Error details: {traceback.format_exc()}")
                 # Log queue state for debugging
-                logging.error(f"Queue state: length={len(self.obstacle_queue)}, configured sensors={list(self.camera_params.keys())}")
+                logging.error(f"Queue state: length={self.obstacle_queue.qsize()}, configured sensors={list(self.camera_params.keys())}")
                 time.sleep(0.01) # Prevent fast error loops
             
     def send_obstacle_distance_message(self, sensing_time, distances, sensor_type):
@@ -1009,7 +1315,29 @@ class RealsenseService:
     
     # Track active cameras to avoid using the same device twice
     active_camera_serials = set()
-    
+
+    # One shared librealsense context for all cameras: device enumeration
+    # issues USB transactions, and a context per ManagedCamera both doubled
+    # that work and could race during advanced-mode toggles
+    _ctx = None
+    _ctx_lock = threading.Lock()
+
+    @classmethod
+    def get_context(cls):
+        with cls._ctx_lock:
+            if cls._ctx is None:
+                cls._ctx = rs.context()
+            return cls._ctx
+
+    @classmethod
+    def invalidate_context(cls):
+        """
+        Drop the shared context (e.g. after an advanced-mode reboot
+        re-enumerates the bus) so the next lookup builds a fresh one
+        """
+        with cls._ctx_lock:
+            cls._ctx = None
+
     def __init__(self):
         try:
             self.settings = Settings()    